@@ -1,14 +1,23 @@
 from flask import Flask, request, jsonify, send_file
 from flask_cors import CORS
+import httpx
 import os
 import uuid
 import threading
-from datetime import datetime
+import time
+import wave
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from datetime import datetime, timedelta
 import shutil
 
 from utils.config import Config
+from utils.pipeline import iterate_in_background
 from services.scraper import ArticleScraper
 from services.llm import PodcastScriptGenerator
+from services.llm_cache import LLMCache, InMemoryLRU, RedisBackend
+from services.semantic_cache import SemanticCache
 from services.tts import SpeechmaticsTTS
 from services.audio import AudioProcessor
 
@@ -21,9 +30,22 @@ except ImportError as e:
     R2Storage = None
     R2_IMPORT_SUCCESS = False
 
-app = Flask(__name__)
+# Use orjson for JSON responses if available
+try:
+    from utils.json_provider import OrjsonProvider
+except ImportError as e:
+    print(f"⚠️  orjson not available, using default JSON encoder: {e}")
+    OrjsonProvider = None
+
+# Frontend assets are served by Flask's built-in static file handler
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'frontend')
+
+app = Flask(__name__, static_folder=FRONTEND_DIR, static_url_path='')
 CORS(app)  # Enable CORS for all routes
 
+if OrjsonProvider:
+    app.json = OrjsonProvider(app)
+
 # Validate configuration
 try:
     Config.validate()
@@ -32,12 +54,53 @@ except ValueError as e:
     print("Please set the required environment variables in a .env file")
     exit(1)
 
+# Shared HTTP connection pool, created once so keep-alive connections survive between jobs
+# (the TTS client and scraper keep their own pooled sessions)
+openai_http_client = httpx.Client(
+    http2=True,
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    timeout=httpx.Timeout(120.0, connect=10.0)
+)
+
+# Cache generated scripts so repeated articles skip the OpenAI call
+llm_cache = LLMCache(InMemoryLRU(maxsize=Config.LLM_CACHE_SIZE), default_ttl=Config.LLM_CACHE_TTL)
+if Config.REDIS_URL:
+    try:
+        llm_cache = LLMCache(RedisBackend(Config.REDIS_URL), default_ttl=Config.LLM_CACHE_TTL)
+        print("✅ Redis script cache enabled")
+    except Exception as e:
+        print(f"⚠️  Failed to initialize Redis script cache, using in-memory cache: {e}")
+
+# Optionally reuse scripts for near-duplicate articles (costs one embedding call per request)
+semantic_cache = None
+if Config.SEMANTIC_CACHE_ENABLED:
+    semantic_cache = SemanticCache(
+        threshold=Config.SEMANTIC_CACHE_THRESHOLD,
+        max_entries=Config.SEMANTIC_CACHE_SIZE,
+        path=Config.SEMANTIC_CACHE_PATH
+    )
+    print("✅ Semantic script cache enabled")
+
 # Initialize services
 scraper = ArticleScraper()
-script_generator = PodcastScriptGenerator(Config.OPENAI_API_KEY)
-tts = SpeechmaticsTTS(Config.SPEECHMATICS_API_KEY)
+script_generator = PodcastScriptGenerator(
+    Config.OPENAI_API_KEY,
+    http_client=openai_http_client,
+    cache=llm_cache,
+    semantic_cache=semantic_cache,
+    use_sdk=Config.OPENAI_USE_SDK
+)
+tts = SpeechmaticsTTS(
+    Config.SPEECHMATICS_API_KEY,
+    max_concurrency=Config.TTS_CONCURRENCY,
+    cache_dir=Config.TTS_CACHE_DIR,
+    cache_max_bytes=Config.TTS_CACHE_MAX_MB * 1024 * 1024
+)
 audio_processor = AudioProcessor()
 
+# Bounded worker pool for podcast generation (excess jobs wait in FIFO order)
+job_executor = ThreadPoolExecutor(max_workers=Config.MAX_CONCURRENT_JOBS)
+
 # Initialize R2 storage if configured
 r2_storage = None
 if R2_IMPORT_SUCCESS and Config.R2_ENABLED:
@@ -58,30 +121,141 @@ elif not R2_IMPORT_SUCCESS:
 else:
     print("⚠️  R2 storage not configured - sharing feature disabled")
 
-# In-memory job storage (in production, use a database)
-jobs = {}
+# In-memory job storage, bounded to Config.MAX_JOBS (in production, use a database)
+jobs = OrderedDict()
+jobs_lock = threading.Lock()
 
 class PodcastJob:
     """Represents a podcast generation job"""
 
-    def __init__(self, job_id: str, url: str):
+    def __init__(self, job_id: str, url: str, include_timings: bool = False):
         self.job_id = job_id
         self.url = url
+        self.include_timings = include_timings  # Keep per-segment timings in metadata
         self.status = "pending"  # pending, processing, completed, failed
         self.progress = 0
         self.message = "Job created"
         self.error = None
         self.output_file = None
         self.partial_output_file = None  # For progressive playback
+        self.partial_writer = None
+        self.partial_lock = threading.Lock()
+        self.pending_partial_combine = False
+        self.last_combined_count = 0
+        self.segment_paths = []
         self.completed_segments = 0
         self.total_segments = 0
         self.metadata = {}
+        self.output_dir = None
+        self.future = None
         self.created_at = datetime.now()
         # Sharing fields
         self.share_id = None
         self.share_url = None
         self.r2_uploaded = False
 
+def is_job_finished(job: PodcastJob) -> bool:
+    """Check whether a job is no longer queued or running"""
+    return job.status in ("completed", "failed")
+
+def remove_job_files(job: PodcastJob):
+    """Delete a job's output directory and final audio file"""
+    if job.output_dir:
+        shutil.rmtree(job.output_dir, ignore_errors=True)
+    if job.output_file:
+        with suppress(FileNotFoundError):
+            os.unlink(job.output_file)
+
+def add_job(job: PodcastJob):
+    """Store a job, evicting the oldest finished jobs beyond Config.MAX_JOBS"""
+    evicted = []
+
+    with jobs_lock:
+        jobs[job.job_id] = job
+
+        for job_id, old_job in list(jobs.items()):
+            if len(jobs) <= Config.MAX_JOBS:
+                break
+            if is_job_finished(old_job):
+                evicted.append(jobs.pop(job_id))
+
+    for old_job in evicted:
+        remove_job_files(old_job)
+
+def cleanup_expired_jobs():
+    """Remove finished jobs and output directories older than Config.JOB_TTL_SECONDS, and trim the TTS cache"""
+    cutoff = datetime.now() - timedelta(seconds=Config.JOB_TTL_SECONDS)
+
+    with jobs_lock:
+        expired = [
+            jobs.pop(job_id) for job_id, job in list(jobs.items())
+            if job.created_at < cutoff and is_job_finished(job)
+        ]
+        known_job_ids = set(jobs)
+
+    for job in expired:
+        remove_job_files(job)
+
+    # The TTS cache lives in a dot directory the sweep below skips, so it is bounded by size instead
+    freed = tts.prune_cache()
+    if freed:
+        print(f"Pruned {freed / (1024 * 1024):.1f} MB from the TTS cache")
+
+    # Remove leftover output directories (e.g. from jobs lost on restart)
+    if not os.path.isdir(Config.OUTPUT_DIR):
+        return
+
+    for entry in os.scandir(Config.OUTPUT_DIR):
+        # Entries are job directories and final "<job_id>.wav" files
+        job_id = entry.name[:-len('.wav')] if entry.name.endswith('.wav') else entry.name
+        if entry.name.startswith('.') or job_id in known_job_ids:
+            continue
+        if entry.stat().st_mtime >= cutoff.timestamp():
+            continue
+        if entry.is_dir():
+            shutil.rmtree(entry.path, ignore_errors=True)
+        else:
+            with suppress(FileNotFoundError):
+                os.unlink(entry.path)
+
+def job_janitor():
+    """Background loop that periodically cleans up expired jobs"""
+    while True:
+        time.sleep(Config.JOB_CLEANUP_INTERVAL)
+        try:
+            cleanup_expired_jobs()
+        except Exception as e:
+            print(f"Job cleanup failed: {e}")
+
+def update_partial_audio(job: PodcastJob):
+    """Append segments completed since the last partial audio request"""
+    with job.partial_lock:
+        completed = job.completed_segments
+        if not job.pending_partial_combine or completed <= job.last_combined_count:
+            return
+
+        if job.partial_writer is None:
+            with wave.open(job.segment_paths[0], 'rb') as wf:
+                params = wf.getparams()
+            job.partial_writer = audio_processor.open_incremental_writer(
+                job.partial_output_file, params.framerate, params.nchannels, params.sampwidth
+            )
+
+        for idx in range(job.last_combined_count, completed):
+            job.partial_writer.append_segment(job.segment_paths[idx])
+
+        job.last_combined_count = completed
+        job.pending_partial_combine = False
+
+def close_partial_audio(job: PodcastJob):
+    """Close the partial audio writer and stop further partial updates"""
+    with job.partial_lock:
+        if job.partial_writer:
+            job.partial_writer.close()
+            job.partial_writer = None
+        job.last_combined_count = job.completed_segments
+        job.pending_partial_combine = False
+
 def generate_podcast(job: PodcastJob):
     """Background task to generate podcast"""
     try:
@@ -102,40 +276,48 @@ def generate_podcast(job: PodcastJob):
         job.progress = 25
         job.message = "Generating podcast script..."
 
-        # Step 2: Generate podcast script
-        dialogue = script_generator.generate_podcast_script(article, target_duration=2.0)
-        estimated_duration = script_generator.estimate_duration(dialogue)
-        job.metadata['estimated_duration'] = estimated_duration
-        job.total_segments = len(dialogue)
-        job.metadata['dialogue_segments'] = job.total_segments
-
-        # Update progress
-        job.progress = 30
-        job.message = f"Generating speech for {job.total_segments} segments..."
-
-        # Step 3: Generate speech for all segments with progress callback
         job_output_dir = os.path.join(Config.OUTPUT_DIR, job.job_id)
         os.makedirs(job_output_dir, exist_ok=True)
+        job.output_dir = job_output_dir
 
         # Partial output for progressive playback
         partial_output_path = os.path.join(job_output_dir, f"podcast_{job.job_id}_partial.wav")
         job.partial_output_file = partial_output_path
 
-        # Progress callback that updates job and combines audio after each batch
+        # Step 2: Stream the podcast script, recording each segment as it arrives
+        dialogue = []
+
+        def stream_dialogue():
+            for segment in script_generator.generate_podcast_script_stream(article, target_duration=2.0):
+                job.segment_paths.append(tts.get_segment_path(job_output_dir, len(dialogue), segment['speaker']))
+                dialogue.append(segment)
+                job.total_segments = len(dialogue)
+                yield segment
+
+        # Progress callback that updates job; partial audio is built when a client requests it
         def progress_callback(completed, total):
+            # While the script is still streaming, the total is the number of segments so far
+            total = total or job.total_segments
             job.completed_segments = completed
-            # Calculate progress: 30% + (completed/total * 60%)
-            job.progress = 30 + int((completed / total) * 60)
+            # Calculate progress: 30% + (completed/total * 60%), never moving backwards
+            job.progress = max(job.progress, 30 + int((completed / total) * 60))
             job.message = f"Generated {completed}/{total} segments..."
+            job.pending_partial_combine = True
 
-            # Combine segments so far for progressive playback
-            if completed >= 1:  # Start offering partial audio after 1 segment
-                try:
-                    audio_processor.combine_from_directory(job_output_dir, partial_output_path, completed)
-                except Exception as e:
-                    print(f"Failed to create partial audio: {e}")
+        # Step 3: Generate speech while the script is still being written
+        job.progress = 30
+        job.message = "Generating podcast script and speech..."
 
-        audio_segments = tts.generate_dialogue_audio(dialogue, job_output_dir, progress_callback)
+        try:
+            audio_segments = tts.generate_dialogue_audio(
+                iterate_in_background(stream_dialogue()), job_output_dir, progress_callback
+            )
+        finally:
+            close_partial_audio(job)
+
+        estimated_duration = script_generator.estimate_duration(dialogue)
+        job.metadata['estimated_duration'] = estimated_duration
+        job.metadata['dialogue_segments'] = job.total_segments
 
         # Update progress
         job.progress = 90
@@ -145,7 +327,9 @@ def generate_podcast(job: PodcastJob):
         output_filename = f"podcast_{job.job_id}.wav"
         output_path = os.path.join(job_output_dir, output_filename)
 
-        combined_metadata = audio_processor.combine_segments(audio_segments, output_path)
+        combined_metadata = audio_processor.combine_segments(
+            audio_segments, output_path, include_timings=job.include_timings
+        )
         job.metadata['audio'] = combined_metadata
 
         # Normalize the final audio
@@ -178,18 +362,18 @@ def generate_podcast(job: PodcastJob):
                 print(f"⚠️  Failed to upload to R2: {e}")
                 # Don't fail the job if sharing upload fails
 
+        # Move the final audio out of the job directory, then drop the segment and partial files in one go
+        final_path = os.path.join(Config.OUTPUT_DIR, f"{job.job_id}.wav")
+        os.replace(output_path, final_path)
+        shutil.rmtree(job_output_dir, ignore_errors=True)
+        job.partial_output_file = None
+        combined_metadata['filepath'] = final_path
+
         # Update progress
+        job.output_file = final_path
         job.progress = 100
         job.status = "completed"
         job.message = "Podcast generation completed!"
-        job.output_file = output_path
-
-        # Clean up temporary segment files
-        for segment in audio_segments:
-            try:
-                os.remove(segment['filepath'])
-            except:
-                pass
 
     except Exception as e:
         job.status = "failed"
@@ -197,6 +381,9 @@ def generate_podcast(job: PodcastJob):
         job.message = f"Failed: {str(e)}"
         print(f"Job {job.job_id} failed: {e}")
 
+# Start the background cleanup of expired jobs and output files
+threading.Thread(target=job_janitor, daemon=True).start()
+
 @app.route('/api/generate', methods=['POST'])
 def generate():
     """Create a new podcast generation job"""
@@ -211,15 +398,19 @@ def generate():
     if not scraper.validate_url(url):
         return jsonify({'error': 'Invalid or inaccessible URL'}), 400
 
+    # Reject new jobs while too many are waiting for a worker
+    with jobs_lock:
+        queued_jobs = sum(1 for queued_job in jobs.values() if queued_job.status == "pending")
+    if queued_jobs >= Config.MAX_QUEUED_JOBS:
+        return jsonify({'error': 'Server is busy, please try again shortly'}), 503
+
     # Create job
     job_id = str(uuid.uuid4())
-    job = PodcastJob(job_id, url)
-    jobs[job_id] = job
+    job = PodcastJob(job_id, url, include_timings=bool(data.get('include_timings', False)))
+    add_job(job)
 
-    # Start background thread
-    thread = threading.Thread(target=generate_podcast, args=(job,))
-    thread.daemon = True
-    thread.start()
+    # Queue on the background worker pool
+    job.future = job_executor.submit(generate_podcast, job)
 
     return jsonify({
         'job_id': job_id,
@@ -272,15 +463,27 @@ def get_audio(job_id):
         if job.status != "processing" or job.completed_segments < 1:
             return jsonify({'error': 'Partial audio not yet available'}), 400
 
+        try:
+            update_partial_audio(job)
+        except Exception as e:
+            print(f"Failed to create partial audio: {e}")
+
         if not job.partial_output_file or not os.path.exists(job.partial_output_file):
             return jsonify({'error': 'Partial audio file not found'}), 404
 
-        return send_file(
+        # The partial file keeps growing, so never let clients reuse a cached copy
+        response = send_file(
             job.partial_output_file,
             mimetype='audio/wav',
             as_attachment=False,
-            download_name=f"podcast_{job_id}_partial.wav"
+            download_name=f"podcast_{job_id}_partial.wav",
+            conditional=True,
+            etag=True,
+            last_modified=os.path.getmtime(job.partial_output_file),
+            max_age=0
         )
+        response.headers['Accept-Ranges'] = 'bytes'
+        return response
     else:
         # Serve final audio
         if job.status != "completed":
@@ -289,12 +492,18 @@ def get_audio(job_id):
         if not job.output_file or not os.path.exists(job.output_file):
             return jsonify({'error': 'Audio file not found'}), 404
 
-        return send_file(
+        # Conditional responses support Range requests, so players can seek without a full download
+        response = send_file(
             job.output_file,
             mimetype='audio/wav',
             as_attachment=False,
-            download_name=f"podcast_{job_id}.wav"
+            download_name=f"podcast_{job_id}.wav",
+            conditional=True,
+            etag=True,
+            last_modified=os.path.getmtime(job.output_file)
         )
+        response.headers['Accept-Ranges'] = 'bytes'
+        return response
 
 @app.route('/api/share/<share_id>', methods=['GET'])
 def get_share_metadata(share_id):
@@ -316,24 +525,18 @@ def get_share_metadata(share_id):
 @app.route('/s/<share_id>', methods=['GET'])
 def serve_share_page(share_id):
     """Serve the share page HTML"""
-    share_html_path = os.path.join(os.path.dirname(__file__), '..', 'frontend', 'share.html')
-    if os.path.exists(share_html_path):
-        return send_file(share_html_path)
+    if os.path.exists(os.path.join(FRONTEND_DIR, 'share.html')):
+        return app.send_static_file('share.html')
     return jsonify({'error': 'Share page not found'}), 404
 
-@app.route('/share.js', methods=['GET'])
-def serve_share_js():
-    """Serve the share page JavaScript"""
-    js_path = os.path.join(os.path.dirname(__file__), '..', 'frontend', 'share.js')
-    if os.path.exists(js_path):
-        return send_file(js_path, mimetype='application/javascript')
-    return '', 404
-
 @app.route('/api/jobs', methods=['GET'])
 def list_jobs():
     """List all jobs"""
+    with jobs_lock:
+        job_snapshot = list(jobs.values())
+
     job_list = []
-    for job in jobs.values():
+    for job in job_snapshot:
         job_list.append({
             'job_id': job.job_id,
             'url': job.url,
@@ -355,74 +558,18 @@ def health():
 @app.route('/', methods=['GET'])
 def index():
     """Serve the frontend"""
-    frontend_path = os.path.join(os.path.dirname(__file__), '..', 'frontend', 'index.html')
-    if os.path.exists(frontend_path):
-        return send_file(frontend_path)
+    if os.path.exists(os.path.join(FRONTEND_DIR, 'index.html')):
+        return app.send_static_file('index.html')
     return jsonify({'message': 'Podcast API is running. Use /api/generate to create a podcast.'})
 
-@app.route('/styles.css', methods=['GET'])
-def styles():
-    """Serve the CSS file"""
-    css_path = os.path.join(os.path.dirname(__file__), '..', 'frontend', 'styles.css')
-    if os.path.exists(css_path):
-        return send_file(css_path, mimetype='text/css')
-    return '', 404
-
-@app.route('/app.js', methods=['GET'])
-def app_js():
-    """Serve the JavaScript file"""
-    js_path = os.path.join(os.path.dirname(__file__), '..', 'frontend', 'app.js')
-    if os.path.exists(js_path):
-        return send_file(js_path, mimetype='application/javascript')
-    return '', 404
-
-@app.route('/SM-Logo-Black.svg', methods=['GET'])
-def logo():
-    """Serve the Speechmatics logo"""
-    logo_path = os.path.join(os.path.dirname(__file__), '..', 'frontend', 'SM-Logo-Black.svg')
-    if os.path.exists(logo_path):
-        return send_file(logo_path, mimetype='image/svg+xml')
-    return '', 404
-
-@app.route('/favicon.svg', methods=['GET'])
-def favicon():
-    """Serve the favicon"""
-    favicon_path = os.path.join(os.path.dirname(__file__), '..', 'frontend', 'favicon.svg')
-    if os.path.exists(favicon_path):
-        return send_file(favicon_path, mimetype='image/svg+xml')
-    return '', 404
-
-@app.route('/jade-gradient.png', methods=['GET'])
-def jade_gradient():
-    """Serve the jade gradient background"""
-    gradient_path = os.path.join(os.path.dirname(__file__), '..', 'frontend', 'jade-gradient.png')
-    if os.path.exists(gradient_path):
-        return send_file(gradient_path, mimetype='image/png')
-    return '', 404
-
-@app.route('/jade-gradient-2.png', methods=['GET'])
-def jade_gradient_2():
-    """Serve the second jade gradient background"""
-    gradient_path = os.path.join(os.path.dirname(__file__), '..', 'frontend', 'jade-gradient-2.png')
-    if os.path.exists(gradient_path):
-        return send_file(gradient_path, mimetype='image/png')
-    return '', 404
-
-@app.route('/amber-gradient.png', methods=['GET'])
-def amber_gradient():
-    """Serve the amber gradient background"""
-    gradient_path = os.path.join(os.path.dirname(__file__), '..', 'frontend', 'amber-gradient.png')
-    if os.path.exists(gradient_path):
-        return send_file(gradient_path, mimetype='image/png')
-    return '', 404
-
-@app.route('/quickcast-logo.png', methods=['GET'])
-def quickcast_logo():
-    """Serve the QuickCast logo"""
-    logo_path = os.path.join(os.path.dirname(__file__), '..', 'frontend', 'quickcast-logo.png')
-    if os.path.exists(logo_path):
-        return send_file(logo_path, mimetype='image/png')
-    return '', 404
+@app.after_request
+def cache_static_files(response):
+    """Let browsers cache frontend assets served by the static handler"""
+    if request.endpoint == 'static' and response.status_code == 200:
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = Config.STATIC_MAX_AGE
+    return response
 
 if __name__ == '__main__':
     # Create output directory if it doesn't exist
@@ -1,6 +1,64 @@
 from pydub import AudioSegment
 from typing import List, Dict
+import numpy as np
 import os
+import wave
+
+# Files with more PCM data than this are normalized in place through a memmap
+NORMALIZE_MEMMAP_THRESHOLD = 100 * 1024 * 1024
+
+# Headroom left below full scale when normalizing (matches pydub's default)
+NORMALIZE_HEADROOM_DB = 0.1
+
+class IncrementalWavWriter:
+    """Appends WAV segments to a growing output file (for progressive playback)"""
+
+    def __init__(self, path: str, sample_rate: int, channels: int, sample_width: int, pause_bytes: bytes):
+        """
+        Open the output file and write an empty WAV header
+
+        Args:
+            path: Path of the WAV file to grow
+            sample_rate: Frame rate shared by all appended segments
+            channels: Channel count shared by all appended segments
+            sample_width: Sample width in bytes shared by all appended segments
+            pause_bytes: Raw silent PCM inserted between segments
+        """
+        self.path = path
+        self.segment_count = 0
+        self._params = (channels, sample_width, sample_rate)
+        self._pause_bytes = pause_bytes
+
+        self._file = open(path, 'wb')
+        self._writer = wave.open(self._file, 'wb')
+        self._writer.setnchannels(channels)
+        self._writer.setsampwidth(sample_width)
+        self._writer.setframerate(sample_rate)
+
+    def append_segment(self, segment_path: str) -> None:
+        """
+        Append one segment's PCM frames (preceded by a pause after the first segment)
+
+        Args:
+            segment_path: Path to the segment WAV file
+        """
+        with wave.open(segment_path, 'rb') as segment:
+            if (segment.getnchannels(), segment.getsampwidth(), segment.getframerate()) != self._params:
+                raise ValueError(f"Segment format does not match partial audio: {segment_path}")
+            frames = segment.readframes(segment.getnframes())
+
+        if self.segment_count:
+            self._writer.writeframesraw(self._pause_bytes)
+
+        # writeframes patches the RIFF header so the file stays playable
+        self._writer.writeframes(frames)
+        self._file.flush()
+        self.segment_count += 1
+
+    def close(self) -> None:
+        """Finalize the WAV header and close the output file"""
+        self._writer.close()
+        self._file.close()
 
 class AudioProcessor:
     """Handles audio processing and combining"""
@@ -14,13 +72,46 @@ class AudioProcessor:
         """
         self.pause_duration = pause_duration
 
-    def combine_segments(self, segments: List[Dict[str, any]], output_path: str) -> Dict[str, any]:
+        # Silent pause as raw PCM, cached with the (channels, sample_width, frame_rate) it was built for
+        self._silence = (None, b'')
+
+    def open_incremental_writer(self, path: str, sample_rate: int, channels: int, sample_width: int) -> IncrementalWavWriter:
+        """
+        Open a WAV writer that grows by one segment at a time (for progressive playback)
+
+        Args:
+            path: Path to save the partial audio
+            sample_rate: Frame rate of the segments
+            channels: Channel count of the segments
+            sample_width: Sample width of the segments in bytes
+
+        Returns:
+            IncrementalWavWriter appending segments with the configured pause
+        """
+        pause_bytes = self._get_silence_bytes(channels, sample_width, sample_rate)
+        return IncrementalWavWriter(path, sample_rate, channels, sample_width, pause_bytes)
+
+    def _get_silence_bytes(self, channels: int, sample_width: int, frame_rate: int) -> bytes:
+        """Get the raw PCM for one pause, reusing the cached buffer when the format matches"""
+        params = (channels, sample_width, frame_rate)
+        cached_params, silence = self._silence
+
+        if cached_params != params:
+            pause_frames = int(self.pause_duration / 1000 * frame_rate)
+            silence = b'\x00' * (pause_frames * sample_width * channels)
+            self._silence = (params, silence)
+
+        return silence
+
+    def combine_segments(self, segments: List[Dict[str, any]], output_path: str,
+                         include_timings: bool = False) -> Dict[str, any]:
         """
         Combine audio segments into a single podcast file
 
         Args:
             segments: List of audio segments with filepath and metadata
             output_path: Path to save the combined audio file
+            include_timings: Include per-segment speaker, text and timing in the result
 
         Returns:
             Dictionary with metadata about the combined audio
@@ -29,55 +120,46 @@ class AudioProcessor:
             raise ValueError("No audio segments to combine")
 
         try:
-            # Create an empty audio segment
-            combined_audio = AudioSegment.empty()
-
-            # Create a silent pause segment
-            pause = AudioSegment.silent(duration=self.pause_duration)
+            # Write the combined audio, collecting each segment's duration
+            durations = self._write_combined([segment['filepath'] for segment in segments], output_path)
 
             total_duration = 0
             segment_timings = []
+            last_idx = len(segments) - 1
 
-            # Combine all segments
-            for segment in segments:
-                # Load the audio file
-                audio = AudioSegment.from_wav(segment['filepath'])
-
-                # Record timing
+            # Accumulate the total duration, recording timings if requested
+            for i, (segment, duration) in enumerate(zip(segments, durations)):
                 start_time = total_duration
-                duration = len(audio) / 1000.0  # Convert to seconds
-
-                segment_timings.append({
-                    'speaker': segment['speaker'],
-                    'text': segment['text'],
-                    'start': start_time,
-                    'duration': duration
-                })
 
-                # Add the audio segment
-                combined_audio += audio
+                if include_timings:
+                    segment_timings.append({
+                        'speaker': segment['speaker'],
+                        'text': segment['text'],
+                        'start': start_time,
+                        'duration': duration
+                    })
 
-                # Add pause (except after the last segment)
-                if segment != segments[-1]:
-                    combined_audio += pause
+                # Account for the pause (except after the last segment)
+                if i != last_idx:
                     total_duration += duration + (self.pause_duration / 1000.0)
                 else:
                     total_duration += duration
 
-            # Export the combined audio
-            combined_audio.export(output_path, format="wav")
-
             # Get file size
             file_size = os.path.getsize(output_path)
 
-            return {
+            result = {
                 'filepath': output_path,
                 'duration': total_duration,
                 'file_size': file_size,
-                'segment_count': len(segments),
-                'timings': segment_timings
+                'segment_count': len(segments)
             }
 
+            if include_timings:
+                result['timings'] = segment_timings
+
+            return result
+
         except Exception as e:
             raise Exception(f"Failed to combine audio segments: {str(e)}")
 
@@ -89,17 +171,78 @@ class AudioProcessor:
             audio_path: Path to the audio file to normalize
         """
         try:
-            audio = AudioSegment.from_wav(audio_path)
-
-            # Normalize to -20 dBFS
-            normalized_audio = audio.normalize()
-
-            # Save back to the same file
-            normalized_audio.export(audio_path, format="wav")
+            with open(audio_path, 'rb') as f:
+                with wave.open(f, 'rb') as wf:
+                    params = wf.getparams()
+                    # wave stops parsing at the data chunk, so this is where PCM starts
+                    data_offset = f.tell()
+
+                    if params.sampwidth != 2:
+                        # Only 16-bit PCM is handled with NumPy
+                        self._normalize_audio_pydub(audio_path)
+                        return
+
+                    sample_count = params.nframes * params.nchannels
+
+                    if sample_count * 2 <= NORMALIZE_MEMMAP_THRESHOLD:
+                        samples = np.frombuffer(wf.readframes(params.nframes), dtype='<i2').copy()
+                    else:
+                        samples = None
+
+            if samples is None:
+                # Scale the PCM region of large files in place without loading it
+                samples = np.memmap(audio_path, dtype='<i2', mode='r+', offset=data_offset, shape=(sample_count,))
+                if self._scale_to_peak(samples):
+                    samples.flush()
+                del samples
+                return
+
+            if self._scale_to_peak(samples):
+                # Save back to the same file
+                with wave.open(audio_path, 'wb') as out:
+                    out.setparams(params)
+                    out.writeframes(samples.tobytes())
 
         except Exception as e:
             raise Exception(f"Failed to normalize audio: {str(e)}")
 
+    def _normalize_audio_pydub(self, audio_path: str) -> None:
+        """Fallback for normalize_audio on non 16-bit audio"""
+        audio = AudioSegment.from_wav(audio_path)
+        normalized_audio = audio.normalize(headroom=NORMALIZE_HEADROOM_DB)
+        normalized_audio.export(audio_path, format="wav")
+
+    @staticmethod
+    def _scale_to_peak(samples: np.ndarray, chunk_size: int = 1 << 20) -> bool:
+        """
+        Scale 16-bit samples in place so the peak sits just below full scale
+
+        Args:
+            samples: Writable int16 array (in memory or memmapped)
+            chunk_size: Number of samples converted to float at a time
+
+        Returns:
+            True if the samples were modified, False for silent audio
+        """
+        if not len(samples):
+            return False
+
+        # Avoid np.abs, which overflows on -32768 and allocates a full copy
+        peak = max(int(samples.max()), -int(samples.min()))
+        if peak == 0:
+            return False
+
+        target_peak = 32768 * (10 ** (-NORMALIZE_HEADROOM_DB / 20))
+        gain = np.float32(target_peak / peak)
+
+        for start in range(0, len(samples), chunk_size):
+            chunk = samples[start:start + chunk_size]
+            scaled = chunk.astype(np.float32) * gain
+            np.clip(scaled, -32768, 32767, out=scaled)
+            chunk[:] = scaled.astype(np.int16)
+
+        return True
+
     def add_intro_outro(self, main_audio_path: str, intro_path: str = None, outro_path: str = None, output_path: str = None) -> str:
         """
         Add intro and/or outro music to the podcast
@@ -145,9 +288,13 @@ class AudioProcessor:
             True if successful, False if no segments found
         """
         try:
-            # Find all segment files
-            import glob
-            segment_files = sorted(glob.glob(os.path.join(output_dir, "segment_*.wav")))
+            # Find all segment files, ordered by their numeric index
+            with os.scandir(output_dir) as entries:
+                segment_files = sorted(
+                    (entry.path for entry in entries
+                     if entry.name.startswith('segment_') and entry.name.endswith('.wav')),
+                    key=lambda path: int(os.path.basename(path).split('_')[1])
+                )
 
             if not segment_files:
                 return False
@@ -156,26 +303,103 @@ class AudioProcessor:
             if max_segments:
                 segment_files = segment_files[:max_segments]
 
-            # Create combined audio
-            combined_audio = AudioSegment.empty()
-            pause = AudioSegment.silent(duration=self.pause_duration)
-
-            for i, filepath in enumerate(segment_files):
-                audio = AudioSegment.from_wav(filepath)
-                combined_audio += audio
-
-                # Add pause except after last segment
-                if i < len(segment_files) - 1:
-                    combined_audio += pause
-
-            # Export
-            combined_audio.export(output_path, format="wav")
+            self._write_combined(segment_files, output_path)
             return True
 
         except Exception as e:
             print(f"Error combining from directory: {e}")
             return False
 
+    def _write_combined(self, filepaths: List[str], output_path: str) -> List[float]:
+        """
+        Concatenate WAV files with a pause between each, copying raw PCM frames
+
+        Args:
+            filepaths: Paths of the WAV files to concatenate, in order
+            output_path: Path to save the combined audio
+
+        Returns:
+            Duration of each input file in seconds
+        """
+        params = self._common_wav_params(filepaths)
+
+        # Headers disagree - let pydub convert everything to a common format
+        if params is None:
+            return self._write_combined_pydub(filepaths, output_path)
+
+        channels, sample_width, frame_rate = params
+        silence = self._get_silence_bytes(channels, sample_width, frame_rate)
+
+        durations = []
+
+        with wave.open(output_path, 'wb') as out:
+            out.setnchannels(channels)
+            out.setsampwidth(sample_width)
+            out.setframerate(frame_rate)
+
+            for i, filepath in enumerate(filepaths):
+                with wave.open(filepath, 'rb') as wf:
+                    nframes = wf.getnframes()
+                    out.writeframesraw(wf.readframes(nframes))
+
+                durations.append(nframes / frame_rate)
+
+                # Add pause except after last segment
+                if i < len(filepaths) - 1:
+                    out.writeframesraw(silence)
+
+        return durations
+
+    def _write_combined_pydub(self, filepaths: List[str], output_path: str) -> List[float]:
+        """Fallback for _write_combined when the input WAV formats differ"""
+        raw_parts = []
+        durations = []
+        channels = sample_width = frame_rate = None
+        silence = b''
+
+        for i, filepath in enumerate(filepaths):
+            audio = AudioSegment.from_wav(filepath)
+
+            # Convert every segment to the first segment's format so raw data can be joined
+            if i == 0:
+                channels, sample_width, frame_rate = audio.channels, audio.sample_width, audio.frame_rate
+                silence = self._get_silence_bytes(channels, sample_width, frame_rate)
+            else:
+                audio = audio.set_frame_rate(frame_rate).set_channels(channels).set_sample_width(sample_width)
+
+            durations.append(len(audio) / 1000.0)
+            raw_parts.append(audio.raw_data)
+
+            # Add pause except after last segment
+            if i < len(filepaths) - 1:
+                raw_parts.append(silence)
+
+        # Join once instead of growing an AudioSegment per segment
+        combined_audio = AudioSegment(
+            data=b''.join(raw_parts),
+            sample_width=sample_width,
+            frame_rate=frame_rate,
+            channels=channels
+        )
+        combined_audio.export(output_path, format="wav")
+        return durations
+
+    @staticmethod
+    def _common_wav_params(filepaths: List[str]):
+        """Return (channels, sample_width, frame_rate) shared by all files, or None if they differ"""
+        params = None
+
+        for filepath in filepaths:
+            with wave.open(filepath, 'rb') as wf:
+                current = (wf.getnchannels(), wf.getsampwidth(), wf.getframerate())
+
+            if params is None:
+                params = current
+            elif current != params:
+                return None
+
+        return params
+
     def get_audio_info(self, audio_path: str) -> Dict[str, any]:
         """
         Get information about an audio file
@@ -1,54 +1,75 @@
-from openai import OpenAI
-from typing import List, Dict
+from openai import AsyncOpenAI, OpenAI, RateLimitError
+from typing import List, Dict, Iterator, Optional, Union
+import asyncio
+import httpx
 import json
+import random
 import re
+import threading
+import time
 
-class PodcastScriptGenerator:
-    """Generates podcast dialogue from article content using OpenAI"""
+from services.llm_cache import LLMCache
+from services.semantic_cache import SemanticCache
 
-    def __init__(self, api_key: str):
-        self.client = OpenAI(api_key=api_key)
-        self.model = "gpt-4o"
+# Use tiktoken to trim article content by tokens if available (falls back to a character limit)
+try:
+    import tiktoken
+except ImportError:
+    print("⚠️  tiktoken not installed, trimming article content by characters")
+    tiktoken = None
 
-    def generate_podcast_script(self, article: Dict[str, str], target_duration: float = 2.5) -> List[Dict[str, str]]:
-        """
-        Generate a conversational podcast script from an article
+# The encoding is downloaded on first use; a failed load is retried after this many seconds
+_ENCODING_RETRY_INTERVAL = 300
+_encoding = None
+_encoding_retry_at = 0.0
+_encoding_lock = threading.Lock()
 
-        Args:
-            article: Dictionary containing title, author, content, and url
-            target_duration: Target duration in minutes (default: 2.0)
+def _get_encoding():
+    """Load the gpt-4o tokenizer on first use; returns None while it cannot be loaded"""
+    global _encoding, _encoding_retry_at
 
-        Returns:
-            List of dialogue segments with speaker and text
-        """
-        # Prepare the prompt
-        system_prompt = self._get_system_prompt()
-        user_prompt = self._get_user_prompt(article, target_duration)
+    if _encoding is not None or tiktoken is None:
+        return _encoding
 
-        try:
-            # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.8,
-                max_tokens=2200
-            )
+    with _encoding_lock:
+        if _encoding is None and time.monotonic() >= _encoding_retry_at:
+            try:
+                _encoding = tiktoken.encoding_for_model("gpt-4o")
+            except Exception as e:
+                _encoding_retry_at = time.monotonic() + _ENCODING_RETRY_INTERVAL
+                print(f"⚠️  Failed to load tiktoken encoding, trimming article content by characters: {e}")
+    return _encoding
 
-            # Parse the response
-            script_text = response.choices[0].message.content
-            dialogue = self._parse_dialogue(script_text)
+# Bump when the prompts or parsing change so cached scripts from older versions are not reused
+PROMPT_VERSION = 2
 
-            return dialogue
+# Article content sent to the model: at most this many tokens (or characters without tiktoken)
+MAX_CONTENT_TOKENS = 1000
+MAX_CONTENT_CHARS = 4000
 
-        except Exception as e:
-            raise Exception(f"Failed to generate podcast script: {str(e)}")
+# Runs of spaces and tabs, collapsed before the article is sent
+_INLINE_WS_RE = re.compile(r'[ \t]+')
+
+# Chat completions endpoint, called directly unless the SDK is requested
+OPENAI_CHAT_COMPLETIONS_URL = "https://api.openai.com/v1/chat/completions"
 
-    def _get_system_prompt(self) -> str:
-        """Get the system prompt for the LLM"""
-        return """You are a podcast script writer who creates engaging, natural conversational dialogues between two hosts: Sarah and Theo.
+# Status codes worth retrying before any content has streamed (same set the SDK retries)
+_RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# Embedding model used to match near-duplicate articles in the semantic cache
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Matches a raw (unstripped) dialogue line: "SPEAKER: dialogue"
+_DIALOGUE_RE = re.compile(r'^\s*(SARAH|THEO)\s*:\s*(\S.*?)\s*$', re.IGNORECASE)
+
+# Maps speaker names as written by the LLM to voice names
+_VOICES = {
+    'SARAH': 'sarah', 'Sarah': 'sarah', 'sarah': 'sarah',
+    'THEO': 'theo', 'Theo': 'theo', 'theo': 'theo'
+}
+
+# System prompt shared by every script request
+_SYSTEM_PROMPT = """You are a podcast script writer who creates engaging, natural conversational dialogues between two hosts: Sarah and Theo.
 
 Sarah is enthusiastic, curious, and asks insightful questions. She often brings up interesting angles.
 Theo is knowledgeable, analytical, and great at explaining complex topics simply. He's warm and engaging.
@@ -68,26 +89,23 @@ SARAH: [dialogue text]
 
 Each line should start with either "SARAH:" or "THEO:" followed by their dialogue."""
 
-    def _get_user_prompt(self, article: Dict[str, str], target_duration: float) -> str:
-        """Generate the user prompt with article content"""
-        word_count = int(target_duration * 150)  # Approximate words for target duration
+# User prompt, filled in per article by _get_user_prompt
+_USER_PROMPT_TEMPLATE = """Transform the following article into a {duration}-minute podcast conversation between Sarah and Theo.
 
-        return f"""Transform the following article into a {target_duration}-minute podcast conversation between Sarah and Theo.
-
-Article Title: {article['title']}
+Article Title: {title}
 
 Article Content:
-{article['content'][:4000]}  # Limit content
+{content}
 
 Instructions:
-- Target approximately {word_count} words total to reach {target_duration} minutes
+- Target approximately {word_count} words total to reach {duration} minutes
 - Structure:
   * Sarah introduces topic with context
   * Discuss 4-5 key points with natural back-and-forth dialogue
   * Include reactions, questions, and deeper exploration of interesting aspects
   * Theo wraps up with insights and takeaways
   * Sarah thanks listeners
-- Make sure to generate enough content to fill the full {target_duration} minutes
+- Make sure to generate enough content to fill the full {duration} minutes
 
 Format each line as:
 SARAH: [text]
@@ -95,41 +113,623 @@ THEO: [text]
 
 Begin the podcast script:"""
 
-    def _parse_dialogue(self, script_text: str) -> List[Dict[str, str]]:
-        """Parse the LLM output into structured dialogue segments"""
+# User prompt for packing several articles into one request, filled in by _get_multi_user_prompt
+_MULTI_PROMPT_TEMPLATE = """Transform each of the following {count} articles into its own independent {duration}-minute podcast conversation between Sarah and Theo.
+
+{articles}
+
+Instructions:
+- Target approximately {word_count} words per podcast to reach {duration} minutes
+- Follow the usual structure for every podcast: Sarah introduces the topic, the hosts discuss 4-5 key points, Theo wraps up with takeaways, and Sarah thanks listeners
+- Each script must use the usual line format (SARAH: [text] / THEO: [text]), one line per turn, separated by newlines
+
+Respond with a JSON object of the form {{"podcasts": [{{"script": "SARAH: ...\\nTHEO: ..."}}]}}, with exactly {count} entries in the same order as the articles."""
+
+class _AsyncRateLimiter:
+    """Token bucket that limits how many requests start per minute"""
+
+    def __init__(self, max_requests_per_minute: int):
+        self.capacity = float(max_requests_per_minute)
+        self.tokens = self.capacity
+        self.refill_rate = max_requests_per_minute / 60.0  # tokens per second
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a request may start"""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_rate)
+                self.updated_at = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) / self.refill_rate)
+
+class PodcastScriptGenerator:
+    """Generates podcast dialogue from article content using OpenAI"""
+
+    def __init__(self, api_key: str, http_client: Optional[httpx.Client] = None,
+                 cache: Optional[LLMCache] = None,
+                 semantic_cache: Optional[SemanticCache] = None,
+                 use_sdk: bool = False):
+        """
+        Initialize the script generator
+
+        Args:
+            api_key: OpenAI API key
+            http_client: Optional shared httpx client so connections are reused across jobs
+            cache: Optional cache of parsed scripts, keyed on the full request
+            semantic_cache: Optional cache that also reuses scripts for near-duplicate articles
+            use_sdk: Stream chat completions through the openai SDK instead of direct HTTP requests
+        """
+        self.api_key = api_key
+        self.cache = cache
+        self.semantic_cache = semantic_cache
+        self.use_sdk = use_sdk
+        self.http_client = http_client or httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=20),
+            timeout=httpx.Timeout(120.0, connect=10.0)
+        )
+        self.client = OpenAI(api_key=api_key, http_client=self.http_client)
+        self.model = "gpt-4o"
+
+    def _new_async_client(self) -> AsyncOpenAI:
+        """
+        Create an async OpenAI client
+
+        Pooled connections belong to the event loop that opened them, so each top-level
+        async call makes its own client (use it with `async with` so it is closed).
+        """
+        return AsyncOpenAI(
+            api_key=self.api_key,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=50),
+                timeout=httpx.Timeout(120.0, connect=10.0)
+            )
+        )
+
+    def generate_podcast_script(self, article: Dict[str, str], target_duration: float = 2.5) -> List[Dict[str, str]]:
+        """
+        Generate a conversational podcast script from an article
+
+        Args:
+            article: Dictionary containing title, author, content, and url
+            target_duration: Target duration in minutes (default: 2.5)
+
+        Returns:
+            List of dialogue segments with speaker and text
+        """
+        # The streaming path already parses, caches and validates the script
+        return list(self.generate_podcast_script_stream(article, target_duration))
+
+    def generate_podcast_script_stream(self, article: Dict[str, str], target_duration: float = 2.5) -> Iterator[Dict[str, str]]:
+        """
+        Generate a podcast script, yielding each dialogue segment as soon as its line is complete
+
+        Args:
+            article: Dictionary containing title, author, content, and url
+            target_duration: Target duration in minutes (default: 2.5)
+
+        Yields:
+            Dialogue segments with speaker and text, in script order
+        """
+        # Prepare the request
+        params = self._get_completion_params(article, target_duration)
+
+        cache_key = self._get_cache_key(params)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            yield from cached
+            return
+
+        embedding, cached = self._semantic_lookup(article, target_duration)
+        if cached is not None:
+            yield from cached
+            return
+
         dialogue = []
 
-        # Split by lines and process
-        lines = script_text.strip().split('\n')
+        try:
+            # Call OpenAI API with streaming so lines can be parsed as they arrive
+            buffer = ''
+            for content in self._stream_chat_completion(params):
+                buffer += content
+
+                # Emit every completed line
+                while '\n' in buffer:
+                    line, buffer = buffer.split('\n', 1)
+                    segment = self._parse_line(line)
+                    if segment:
+                        dialogue.append(segment)
+                        yield segment
+
+            # The last line may not end with a newline
+            segment = self._parse_line(buffer)
+            if segment:
+                dialogue.append(segment)
+                yield segment
+
+        except Exception as e:
+            raise Exception(f"Failed to generate podcast script: {str(e)}")
+
+        if not dialogue:
+            raise ValueError("Failed to parse dialogue from LLM response")
+
+        self._cache_set(cache_key, dialogue)
+        self._semantic_store(embedding, target_duration, dialogue)
+
+    def _stream_chat_completion(self, params: Dict[str, any], max_retries: int = 2) -> Iterator[str]:
+        """
+        Stream a chat completion, yielding content deltas as they arrive
+
+        Posts to the API directly over the shared httpx client and reads the
+        server-sent events as plain JSON, skipping the SDK's response models.
+
+        Args:
+            params: Chat completion request parameters
+            max_retries: Retries on connection errors and retryable status codes (default: 2)
+
+        Yields:
+            Pieces of the assistant message text
+        """
+        if self.use_sdk:
+            for chunk in self.client.chat.completions.create(**params, stream=True):
+                if chunk.choices:
+                    yield chunk.choices[0].delta.content or ''
+            return
+
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        payload = {**params, "stream": True}
+        streamed = False
+
+        for attempt in range(max_retries + 1):
+            try:
+                with self.http_client.stream("POST", OPENAI_CHAT_COMPLETIONS_URL, json=payload, headers=headers) as response:
+                    if response.status_code in _RETRYABLE_STATUS_CODES and attempt < max_retries:
+                        retryable = True
+                    elif response.is_error:
+                        response.read()
+                        raise Exception(f"OpenAI API error {response.status_code}: {response.text}")
+                    else:
+                        retryable = False
+                        for line in response.iter_lines():
+                            if not line.startswith("data: "):
+                                continue
+
+                            data = line[6:]
+                            if data == "[DONE]":
+                                break
+
+                            choices = json.loads(data).get("choices")
+                            if choices:
+                                streamed = True
+                                yield choices[0]["delta"].get("content") or ''
+            except httpx.TransportError:
+                # Content already handed out cannot be replayed, so only retry before the first delta
+                if streamed or attempt == max_retries:
+                    raise
+                retryable = True
+
+            if not retryable:
+                return
+
+            wait_time = min(0.5 * 2 ** attempt, 8) + random.uniform(0, 0.25)
+            print(f"OpenAI request failed, retrying in {wait_time:.1f}s...")
+            time.sleep(wait_time)
+
+    async def agenerate_podcast_script(self, article: Dict[str, str], target_duration: float = 2.5,
+                                       max_retries: int = 4,
+                                       rate_limiter: Optional["_AsyncRateLimiter"] = None,
+                                       client: Optional[AsyncOpenAI] = None) -> List[Dict[str, str]]:
+        """
+        Generate a podcast script with the async client, retrying on rate limits
+
+        Args:
+            article: Dictionary containing title, author, content, and url
+            target_duration: Target duration in minutes (default: 2.5)
+            max_retries: Maximum number of attempts on RateLimitError (default: 4)
+            rate_limiter: Optional limiter shared by concurrent calls
+            client: Optional async client to send the request with; by default one is
+                    created for this call
+
+        Returns:
+            List of dialogue segments with speaker and text
+        """
+        if client is None:
+            async with self._new_async_client() as client:
+                return await self.agenerate_podcast_script(article, target_duration, max_retries,
+                                                           rate_limiter, client)
 
-        for line in lines:
-            line = line.strip()
-            if not line:
+        params = self._get_completion_params(article, target_duration)
+
+        cache_key = self._get_cache_key(params)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        # The embedding request is blocking, so keep it off the event loop
+        embedding, cached = await asyncio.to_thread(self._semantic_lookup, article, target_duration)
+        if cached is not None:
+            return cached
+
+        try:
+            for attempt in range(max_retries):
+                if rate_limiter:
+                    await rate_limiter.acquire()
+
+                try:
+                    response = await client.chat.completions.create(**params)
+                    break
+                except RateLimitError:
+                    if attempt == max_retries - 1:
+                        raise
+                    wait_time = 2 ** (attempt + 1) + random.uniform(0, 1)
+                    print(f"OpenAI rate limit hit, retrying in {wait_time:.1f}s...")
+                    await asyncio.sleep(wait_time)
+
+            # Parse the response
+            script_text = response.choices[0].message.content
+            dialogue = self._parse_dialogue(script_text)
+
+            self._cache_set(cache_key, dialogue)
+            self._semantic_store(embedding, target_duration, dialogue)
+            return dialogue
+
+        except Exception as e:
+            raise Exception(f"Failed to generate podcast script: {str(e)}")
+
+    async def generate_many(self, articles: List[Dict[str, str]], target_duration: float = 2.5,
+                            concurrency: int = 10,
+                            max_requests_per_minute: Optional[int] = None) -> List[Union[List[Dict[str, str]], Exception]]:
+        """
+        Generate scripts for several articles concurrently
+
+        Args:
+            articles: Articles to turn into podcast scripts
+            target_duration: Target duration in minutes (default: 2.5)
+            concurrency: Maximum number of requests in flight at once (default: 10)
+            max_requests_per_minute: Optional cap on how many requests start per minute
+
+        Returns:
+            One entry per article, in order: the dialogue, or the Exception that failed it
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        rate_limiter = _AsyncRateLimiter(max_requests_per_minute) if max_requests_per_minute else None
+
+        async with self._new_async_client() as client:
+
+            async def bounded(article):
+                async with semaphore:
+                    return await self.agenerate_podcast_script(article, target_duration,
+                                                               rate_limiter=rate_limiter, client=client)
+
+            return await asyncio.gather(*[bounded(article) for article in articles], return_exceptions=True)
+
+    def generate_podcast_scripts_multi(self, articles: List[Dict[str, str]], target_duration: float = 2.5,
+                                       k: int = 4) -> List[Union[List[Dict[str, str]], Exception]]:
+        """
+        Generate scripts for several articles, packing up to k of them into each request
+
+        Packing trades a longer single response for fewer requests, which helps when the
+        requests-per-minute limit is the bottleneck. Groups whose response cannot be parsed
+        fall back to one request per article.
+
+        Args:
+            articles: Articles to turn into podcast scripts
+            target_duration: Target duration in minutes (default: 2.5)
+            k: Maximum number of articles per request (default: 4)
+
+        Returns:
+            One entry per article, in order: the dialogue, or the Exception that failed it
+        """
+        scripts = []
+
+        for start in range(0, len(articles), k):
+            group = articles[start:start + k]
+
+            params = {
+                "model": self.model,
+                "messages": [
+                    {"role": "system", "content": _SYSTEM_PROMPT},
+                    {"role": "user", "content": self._get_multi_user_prompt(group, target_duration)}
+                ],
+                "temperature": 0.8,
+                "max_tokens": min(2200 * len(group), 16000),
+                "response_format": {"type": "json_object"}
+            }
+
+            # Packed scripts come from a different prompt and token budget than single-article
+            # requests, so they are cached under the packed request rather than per article
+            cache_key = self._get_cache_key(params)
+            dialogues = self._cache_get(cache_key)
+            if dialogues is not None:
+                scripts.extend(dialogues)
+                continue
+
+            try:
+                response = self.client.chat.completions.create(**params)
+                podcasts = json.loads(response.choices[0].message.content)["podcasts"]
+                if len(podcasts) != len(group):
+                    raise ValueError(f"Expected {len(group)} scripts, got {len(podcasts)}")
+                dialogues = [self._parse_dialogue(podcast["script"]) for podcast in podcasts]
+            except Exception as e:
+                print(f"⚠️  Packed script request failed, generating articles one by one: {e}")
+                for article in group:
+                    try:
+                        scripts.append(self.generate_podcast_script(article, target_duration))
+                    except Exception as article_error:
+                        scripts.append(article_error)
                 continue
 
-            # Match pattern: "SPEAKER: dialogue"
-            match = re.match(r'^(SARAH|THEO):\s*(.+)$', line, re.IGNORECASE)
+            self._cache_set(cache_key, dialogues)
+            scripts.extend(dialogues)
+
+        return scripts
+
+    def submit_batch(self, articles: List[Dict[str, str]], target_duration: float = 2.5) -> str:
+        """
+        Submit scripts for several articles to the OpenAI Batch API
+
+        Batch requests cost half as much and use a separate rate limit pool, but
+        complete within 24 hours rather than seconds, so this is for bulk,
+        non-interactive work. Each request's custom_id is the article's index.
+
+        Args:
+            articles: Articles to turn into podcast scripts
+            target_duration: Target duration in minutes (default: 2.5)
+
+        Returns:
+            The batch ID, to pass to await_batch
+        """
+        lines = [
+            json.dumps({
+                "custom_id": str(index),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._get_completion_params(article, target_duration)
+            })
+            for index, article in enumerate(articles)
+        ]
 
-            if match:
-                speaker = match.group(1).upper()
-                text = match.group(2).strip()
+        batch_file = self.client.files.create(
+            file=("podcast_scripts.jsonl", '\n'.join(lines).encode('utf-8')),
+            purpose="batch"
+        )
+        batch = self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        return batch.id
 
-                # Map to voice names
-                voice = "sarah" if speaker == "SARAH" else "theo"
+    async def await_batch(self, batch_id: str, poll_interval: float = 30.0,
+                          client: Optional[AsyncOpenAI] = None) -> Dict[str, Union[List[Dict[str, str]], Exception]]:
+        """
+        Wait for a batch to finish and parse its scripts
+
+        Args:
+            batch_id: ID returned by submit_batch
+            poll_interval: Seconds between status checks (default: 30)
+            client: Optional async client to poll with; by default one is created for this call
+
+        Returns:
+            Mapping of custom_id to the dialogue, or the Exception that failed that request
+        """
+        if client is None:
+            async with self._new_async_client() as client:
+                return await self.await_batch(batch_id, poll_interval, client)
 
-                dialogue.append({
-                    "speaker": voice,
-                    "text": text
-                })
+        while True:
+            batch = await client.batches.retrieve(batch_id)
+            if batch.status in ("completed", "failed", "expired", "cancelled"):
+                break
+            await asyncio.sleep(poll_interval)
+
+        if batch.status != "completed" and not batch.output_file_id:
+            raise Exception(f"Batch {batch_id} {batch.status}")
+
+        results = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+
+            content = await client.files.content(file_id)
+            for line in content.text.splitlines():
+                if line.strip():
+                    custom_id, result = self._parse_batch_result(json.loads(line))
+                    results[custom_id] = result
+
+        return results
+
+    async def generate_podcast_scripts_batch(self, articles: List[Dict[str, str]], target_duration: float = 2.5,
+                                             poll_interval: float = 30.0) -> List[Union[List[Dict[str, str]], Exception]]:
+        """
+        Generate scripts for several articles through the Batch API and wait for them
+
+        Args:
+            articles: Articles to turn into podcast scripts
+            target_duration: Target duration in minutes (default: 2.5)
+            poll_interval: Seconds between status checks (default: 30)
+
+        Returns:
+            One entry per article, in order: the dialogue, or the Exception that failed it
+        """
+        batch_id = await asyncio.to_thread(self.submit_batch, articles, target_duration)
+        results = await self.await_batch(batch_id, poll_interval)
+
+        scripts = []
+        for index, article in enumerate(articles):
+            result = results.get(str(index), Exception(f"No result for article {index} in batch {batch_id}"))
+            if not isinstance(result, Exception):
+                self._cache_set(self._get_cache_key(self._get_completion_params(article, target_duration)), result)
+            scripts.append(result)
+
+        return scripts
+
+    def _parse_batch_result(self, line: Dict[str, any]):
+        """Parse one line of a batch output or error file into (custom_id, dialogue or Exception)"""
+        custom_id = line.get("custom_id")
+        response = line.get("response") or {}
+
+        if line.get("error") or response.get("status_code") != 200:
+            error = line.get("error") or response.get("body", {}).get("error")
+            return custom_id, Exception(f"Failed to generate podcast script: {error}")
+
+        try:
+            script_text = response["body"]["choices"][0]["message"]["content"]
+            return custom_id, self._parse_dialogue(script_text)
+        except Exception as e:
+            return custom_id, Exception(f"Failed to generate podcast script: {str(e)}")
+
+    def _get_completion_params(self, article: Dict[str, str], target_duration: float) -> Dict[str, any]:
+        """Build the chat completion request for an article"""
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": _SYSTEM_PROMPT},
+                {"role": "user", "content": self._get_user_prompt(article, target_duration)}
+            ],
+            "temperature": 0.8,
+            "max_tokens": 2200
+        }
+
+    def _get_cache_key(self, params: Dict[str, any]) -> Optional[str]:
+        """Build the cache key for a completion request (None when caching is disabled)"""
+        if not self.cache:
+            return None
+        return LLMCache.make_key({"version": PROMPT_VERSION, **params})
+
+    def _cache_get(self, cache_key: Optional[str]) -> Optional[List[Dict[str, str]]]:
+        """Look up a cached script"""
+        if cache_key is None:
+            return None
+        return self.cache.get(cache_key)
+
+    def _cache_set(self, cache_key: Optional[str], dialogue: List[Dict[str, str]]) -> None:
+        """Store a parsed script in the cache"""
+        if cache_key is not None:
+            self.cache.set(cache_key, dialogue)
+
+    def _semantic_lookup(self, article: Dict[str, str], target_duration: float):
+        """
+        Embed an article and look it up in the semantic cache
+
+        Returns:
+            Tuple of (embedding, cached dialogue); both are None when the cache is disabled or fails
+        """
+        if not self.semantic_cache:
+            return None, None
+
+        try:
+            response = self.client.embeddings.create(
+                model=EMBEDDING_MODEL,
+                input=f"{article['title']} {article['content'][:500]}"
+            )
+            embedding = response.data[0].embedding
+            return embedding, self.semantic_cache.lookup(embedding, self._get_semantic_scope(target_duration))
+        except Exception as e:
+            print(f"⚠️  Semantic cache lookup failed: {e}")
+            return None, None
+
+    def _semantic_store(self, embedding: Optional[List[float]], target_duration: float,
+                        dialogue: List[Dict[str, str]]) -> None:
+        """Remember a generated script for near-duplicate articles"""
+        if embedding is None:
+            return
+
+        try:
+            self.semantic_cache.store(embedding, dialogue, self._get_semantic_scope(target_duration))
+        except Exception as e:
+            print(f"⚠️  Semantic cache write failed: {e}")
+
+    def _get_semantic_scope(self, target_duration: float) -> str:
+        """Settings a semantic match must share, so scripts are only reused for the same prompt, model and length"""
+        return json.dumps([PROMPT_VERSION, self.model, target_duration])
+
+    def _get_user_prompt(self, article: Dict[str, str], target_duration: float) -> str:
+        """Generate the user prompt with article content"""
+        return _USER_PROMPT_TEMPLATE.format(
+            title=article['title'],
+            content=self._trim_content(article['content']),
+            duration=target_duration,
+            word_count=int(target_duration * 150)  # Approximate words for target duration
+        )
+
+    def _get_multi_user_prompt(self, articles: List[Dict[str, str]], target_duration: float) -> str:
+        """Generate the user prompt for several articles packed into one request"""
+        sections = [
+            f"Article {number}:\nTitle: {article['title']}\n<<<\n{self._trim_content(article['content'])}\n>>>"
+            for number, article in enumerate(articles, 1)
+        ]
+        return _MULTI_PROMPT_TEMPLATE.format(
+            count=len(articles),
+            articles='\n\n'.join(sections),
+            duration=target_duration,
+            word_count=int(target_duration * 150)
+        )
+
+    def _trim_content(self, content: str) -> str:
+        """Collapse redundant whitespace and limit the article to MAX_CONTENT_TOKENS tokens"""
+        content = _INLINE_WS_RE.sub(' ', content).strip()
+
+        encoding = _get_encoding()
+        if encoding is None:
+            return content[:MAX_CONTENT_CHARS]
+
+        tokens = encoding.encode(content, disallowed_special=())
+        if len(tokens) <= MAX_CONTENT_TOKENS:
+            return content
+        return encoding.decode(tokens[:MAX_CONTENT_TOKENS])
+
+    def _parse_dialogue(self, script_text: str) -> List[Dict[str, str]]:
+        """Parse the LLM output into structured dialogue segments"""
+        dialogue = []
+
+        # Parse each line in a single pass; _parse_line handles surrounding whitespace
+        for line in script_text.splitlines():
+            segment = self._parse_line(line)
+            if segment:
+                dialogue.append(segment)
 
         if not dialogue:
             raise ValueError("Failed to parse dialogue from LLM response")
 
         return dialogue
 
+    def _parse_line(self, line: str) -> Optional[Dict[str, str]]:
+        """Parse a single script line into a dialogue segment, or None if it is not dialogue"""
+        # Fast path for the exact format the prompt asks for
+        line = line.strip()
+        if line.startswith('SARAH:'):
+            speaker, text = 'sarah', line[6:].lstrip()
+        elif line.startswith('THEO:'):
+            speaker, text = 'theo', line[5:].lstrip()
+        else:
+            # Fall back to the regex for other casing or spacing (e.g. "Sarah :")
+            match = _DIALOGUE_RE.match(line)
+            if not match:
+                return None
+            speaker, text = match.groups()
+            speaker = _VOICES.get(speaker) or speaker.lower()
+
+        if not text:
+            return None
+
+        return {
+            "speaker": speaker,
+            "text": text
+        }
+
     def estimate_duration(self, dialogue: List[Dict[str, str]]) -> float:
         """Estimate the duration of the podcast in minutes"""
-        total_words = sum(len(segment['text'].split()) for segment in dialogue)
+        # Count words as spaces + 1 to avoid allocating a token list per segment
+        # (segment text is already stripped by the parser)
+        total_words = sum(segment['text'].count(' ') + 1 for segment in dialogue if segment['text'])
         # Average speaking rate is ~150 words per minute
         estimated_minutes = total_words / 150
         return round(estimated_minutes, 1)
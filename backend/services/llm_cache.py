@@ -0,0 +1,111 @@
+from collections import OrderedDict
+from typing import Any, Optional
+import hashlib
+import json
+import threading
+import time
+
+class InMemoryLRU:
+    """In-process cache backend with LRU eviction and per-entry expiry"""
+
+    def __init__(self, maxsize: int = 256):
+        """
+        Initialize the in-memory backend
+
+        Args:
+            maxsize: Maximum number of entries kept before the least recently used is evicted
+        """
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Store a value, optionally expiring after ttl seconds"""
+        expires_at = time.monotonic() + ttl if ttl else None
+
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        """Remove an entry if present"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+class RedisBackend:
+    """Redis cache backend, shared by every process using the same Redis instance"""
+
+    def __init__(self, url: str, prefix: str = 'quickcast:llm:'):
+        """
+        Initialize the Redis backend
+
+        Args:
+            url: Redis connection URL (e.g. redis://localhost:6379/0)
+            prefix: Prefix added to every key
+        """
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None if missing"""
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Store a JSON-serializable value, optionally expiring after ttl seconds"""
+        self.client.set(self.prefix + key, json.dumps(value), ex=ttl)
+
+class LLMCache:
+    """Exact-match cache for LLM responses, keyed on a hash of the full request"""
+
+    def __init__(self, backend=None, default_ttl: int = 86400):
+        """
+        Initialize the cache
+
+        Args:
+            backend: Storage backend with get/set (default: InMemoryLRU)
+            default_ttl: Expiry in seconds for entries stored without an explicit ttl
+        """
+        self.backend = backend or InMemoryLRU()
+        self.default_ttl = default_ttl
+
+    @staticmethod
+    def make_key(request: dict) -> str:
+        """Hash a JSON-serializable request description into a cache key"""
+        payload = json.dumps(request, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss or backend error"""
+        try:
+            return self.backend.get(key)
+        except Exception as e:
+            print(f"⚠️  LLM cache read failed: {e}")
+            return None
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Store a value; backend errors are logged and ignored"""
+        try:
+            self.backend.set(key, value, ttl or self.default_ttl)
+        except Exception as e:
+            print(f"⚠️  LLM cache write failed: {e}")
@@ -1,16 +1,48 @@
+import asyncio
+import httpx
+import io
 import requests
-from bs4 import BeautifulSoup, Tag
-from typing import Dict, Optional
+from requests.adapters import HTTPAdapter
+from selectolax.lexbor import LexborHTMLParser as HTMLParser
+from typing import Dict, List, Optional, Union
+from urllib3.util.retry import Retry
 import re
 
+# Runs of three or more newlines, collapsed to a single blank line in extracted text
+_MULTI_NL_RE = re.compile(r'\n{3,}')
+
 class ArticleScraper:
     """Scrapes article content from URLs"""
 
-    def __init__(self):
+    def __init__(self, session: Optional[requests.Session] = None):
+        """
+        Initialize the scraper
+
+        Args:
+            session: Optional requests session; by default a pooled session with keep-alive and retries is created
+        """
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
 
+        if session is None:
+            # Reuse connections across scrapes of the same host instead of a new TCP+TLS handshake each time
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=20,
+                pool_maxsize=50,
+                max_retries=Retry(total=3, backoff_factor=0.3)
+            )
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+
+        self.session = session
+        self.session.headers.update(self.headers)
+
+    def close(self) -> None:
+        """Close pooled connections"""
+        self.session.close()
+
     def scrape_url(self, url: str) -> Dict[str, str]:
         """
         Scrape content from a given URL
@@ -23,184 +55,221 @@ class ArticleScraper:
         """
         try:
             # Fetch the webpage
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.session.get(url, timeout=10)
             response.raise_for_status()
 
-            # Parse the HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
+            return self._parse_html(response.content, url)
 
-            # Extract title
-            title = self._extract_title(soup)
+        except requests.RequestException as e:
+            raise Exception(f"Failed to fetch URL: {str(e)}")
+        except Exception as e:
+            raise Exception(f"Failed to parse content: {str(e)}")
 
-            # Extract author (if available)
-            author = self._extract_author(soup)
+    async def scrape_urls(self, urls: List[str], concurrency: int = 10) -> List[Union[Dict[str, str], Exception]]:
+        """
+        Scrape several URLs concurrently
 
-            # Extract main content
-            content = self._extract_content(soup)
+        Args:
+            urls: The URLs to scrape
+            concurrency: Maximum number of requests in flight at once (default: 10)
 
-            if not content:
-                raise ValueError("Could not extract meaningful content from the URL")
+        Returns:
+            One entry per URL, in order: the article dictionary, or the Exception that failed it
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async with httpx.AsyncClient(
+            http2=True,
+            headers=self.headers,
+            timeout=10,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=concurrency)
+        ) as client:
+
+            async def scrape_one(url):
+                async with semaphore:
+                    try:
+                        response = await client.get(url)
+                        response.raise_for_status()
+                    except httpx.HTTPError as e:
+                        raise Exception(f"Failed to fetch URL: {str(e)}")
+
+                try:
+                    return self._parse_html(response.content, url)
+                except Exception as e:
+                    raise Exception(f"Failed to parse content: {str(e)}")
+
+            return await asyncio.gather(*[scrape_one(url) for url in urls], return_exceptions=True)
+
+    def _parse_html(self, html: bytes, url: str) -> Dict[str, str]:
+        """
+        Extract the article from a fetched page
 
-            return {
-                'title': title,
-                'author': author,
-                'content': content,
-                'url': url
-            }
+        Args:
+            html: Raw page content
+            url: The URL the page was fetched from
 
-        except requests.RequestException as e:
-            raise Exception(f"Failed to fetch URL: {str(e)}")
-        except Exception as e:
-            raise Exception(f"Failed to parse content: {str(e)}")
+        Returns:
+            Dictionary containing title, author (if available), content, and url
+        """
+        # Parse the HTML (selectolax keeps parsing and traversal in C)
+        tree = HTMLParser(html)
+
+        # Extract title
+        title = self._extract_title(tree)
+
+        # Extract author (if available)
+        author = self._extract_author(tree)
+
+        # Extract main content
+        content = self._extract_content(tree)
+
+        if not content:
+            raise ValueError("Could not extract meaningful content from the URL")
+
+        return {
+            'title': title,
+            'author': author,
+            'content': content,
+            'url': url
+        }
 
-    def _extract_title(self, soup: BeautifulSoup) -> str:
+    def _extract_title(self, tree: HTMLParser) -> str:
         """Extract the article title"""
         # Try different title selectors
         title_selectors = [
-            soup.find('h1'),
-            soup.find('meta', property='og:title'),
-            soup.find('meta', attrs={'name': 'twitter:title'}),
-            soup.find('title')
+            'h1',
+            'meta[property="og:title"]',
+            'meta[name="twitter:title"]',
+            'title'
         ]
 
         for selector in title_selectors:
-            if selector:
-                if selector.name == 'meta':
-                    return selector.get('content', 'Untitled Article')
-                return selector.get_text(strip=True)
+            node = tree.css_first(selector)
+            if node:
+                if node.tag == 'meta':
+                    return node.attributes.get('content') or 'Untitled Article'
+                return node.text(strip=True)
 
         return 'Untitled Article'
 
-    def _extract_author(self, soup: BeautifulSoup) -> Optional[str]:
+    def _extract_author(self, tree: HTMLParser) -> Optional[str]:
         """Extract the article author"""
         # Try different author selectors
         author_selectors = [
-            soup.find('meta', attrs={'name': 'author'}),
-            soup.find('meta', property='article:author'),
-            soup.find('span', class_='author'),
-            soup.find('a', rel='author')
+            'meta[name="author"]',
+            'meta[property="article:author"]',
+            'span.author',
+            'a[rel~="author"]'
         ]
 
         for selector in author_selectors:
-            if selector:
-                if selector.name == 'meta':
-                    return selector.get('content')
-                return selector.get_text(strip=True)
+            node = tree.css_first(selector)
+            if node:
+                if node.tag == 'meta':
+                    return node.attributes.get('content')
+                return node.text(strip=True)
 
         return None
 
-    def _extract_content(self, soup: BeautifulSoup) -> str:
+    def _extract_content(self, tree: HTMLParser) -> str:
         """Extract the main article content including headings, lists, quotes, and images"""
         # Remove unwanted elements
-        for element in soup(['script', 'style', 'nav', 'header', 'footer', 'aside', 'iframe', 'form']):
-            element.decompose()
-
-        # Try to find the main article content
-        content_elements = [
-            soup.find('article'),
-            soup.find('div', class_='article-content'),
-            soup.find('div', class_='post-content'),
-            soup.find('div', class_='entry-content'),
-            soup.find('main'),
-            soup.find('div', id='content')
+        tree.strip_tags(['script', 'style', 'nav', 'header', 'footer', 'aside', 'iframe', 'form'])
+
+        # Try to find the main article content, falling back to the body
+        content_selectors = [
+            'article',
+            'div.article-content',
+            'div.post-content',
+            'div.entry-content',
+            'main',
+            'div#content',
+            'body'
         ]
 
         content = None
-        for element in content_elements:
-            if element:
-                content = element
+        for selector in content_selectors:
+            content = tree.css_first(selector)
+            if content:
                 break
 
-        # If no specific content container found, use the body
-        if not content:
-            content = soup.find('body')
-
         if not content:
             return ""
 
-        # Extract content in order, preserving structure
-        text_parts = []
-        processed_elements = set()  # Track processed elements to avoid duplicates
+        # Extract content in document order, preserving structure. Elements that are
+        # turned into text are not descended into; other containers are walked.
+        buffer = io.StringIO()
 
-        # Process direct children recursively
-        def process_element(elem):
-            # Skip if already processed or not a Tag element
-            if id(elem) in processed_elements or not isinstance(elem, Tag):
-                return
+        def emit(text: str) -> None:
+            buffer.write(text)
+            buffer.write('\n\n')
 
-            processed_elements.add(id(elem))
+        stack = list(content.iter(include_text=False))
+        stack.reverse()
 
-            if elem.name == 'p':
-                text = elem.get_text(strip=True)
+        while stack:
+            elem = stack.pop()
+
+            if elem.tag == 'p':
+                text = elem.text(strip=True)
                 if text:
-                    text_parts.append(text)
+                    emit(text)
 
-            elif elem.name in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
-                text = elem.get_text(strip=True)
+            elif elem.tag in ('h1', 'h2', 'h3', 'h4', 'h5', 'h6'):
+                text = elem.text(strip=True)
                 if text:
                     # Add heading with emphasis for context
-                    text_parts.append(f"\n{text}\n")
+                    emit(f"\n{text}\n")
 
-            elif elem.name == 'blockquote':
-                text = elem.get_text(strip=True)
+            elif elem.tag == 'blockquote':
+                text = elem.text(strip=True)
                 if text:
-                    text_parts.append(f'"{text}"')
+                    emit(f'"{text}"')
 
-            elif elem.name in ['ul', 'ol']:
+            elif elem.tag in ('ul', 'ol'):
                 # Extract list items
-                list_items = elem.find_all('li', recursive=False)
-                for li in list_items:
-                    text = li.get_text(strip=True)
-                    if text:
-                        text_parts.append(f"- {text}")
-                    processed_elements.add(id(li))
+                for li in elem.iter(include_text=False):
+                    if li.tag == 'li':
+                        text = li.text(strip=True)
+                        if text:
+                            emit(f"- {text}")
 
-            elif elem.name == 'figure':
+            elif elem.tag == 'figure':
                 # Handle figures with images and captions
-                img = elem.find('img')
+                img = elem.css_first('img')
                 if img:
-                    alt_text = img.get('alt', '').strip()
+                    alt_text = (img.attributes.get('alt') or '').strip()
                     if alt_text and len(alt_text) > 5:
-                        text_parts.append(f"[Image: {alt_text}]")
-                    processed_elements.add(id(img))
+                        emit(f"[Image: {alt_text}]")
 
-                caption = elem.find('figcaption')
+                caption = elem.css_first('figcaption')
                 if caption:
-                    text = caption.get_text(strip=True)
+                    text = caption.text(strip=True)
                     if text:
-                        text_parts.append(f"[Caption: {text}]")
-                    processed_elements.add(id(caption))
+                        emit(f"[Caption: {text}]")
 
-            elif elem.name == 'img' and id(elem) not in processed_elements:
+            elif elem.tag == 'img':
                 # Standalone images
-                alt_text = elem.get('alt', '').strip()
+                alt_text = (elem.attributes.get('alt') or '').strip()
                 if alt_text and len(alt_text) > 5:
-                    text_parts.append(f"[Image: {alt_text}]")
+                    emit(f"[Image: {alt_text}]")
 
             else:
-                # Recursively process children for other containers
-                if hasattr(elem, 'children'):
-                    for child in elem.children:
-                        if isinstance(child, Tag):
-                            process_element(child)
-
-        # Start processing from the content root
-        for child in content.children:
-            if isinstance(child, Tag):
-                process_element(child)
-
-        # Join with proper spacing and remove excessive newlines
-        text_content = '\n\n'.join(text_parts)
+                # Walk the children of other containers
+                children = list(elem.iter(include_text=False))
+                children.reverse()
+                stack.extend(children)
 
-        # Clean up excessive whitespace
-        text_content = re.sub(r'\n{3,}', '\n\n', text_content)
+        # Clean up excessive whitespace (parts are already separated by blank lines)
+        text_content = _MULTI_NL_RE.sub('\n\n', buffer.getvalue())
 
         return text_content.strip()
 
     def validate_url(self, url: str) -> bool:
         """Check if the URL is valid and accessible"""
         try:
-            response = requests.head(url, headers=self.headers, timeout=5, allow_redirects=True)
+            response = self.session.head(url, timeout=5, allow_redirects=True)
             return response.status_code == 200
         except:
             return False
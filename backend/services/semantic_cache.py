@@ -0,0 +1,122 @@
+from typing import Any, List, Optional, Sequence
+import json
+import os
+import threading
+
+import numpy as np
+
+class SemanticCache:
+    """Similarity cache: returns a stored value when a new embedding is close enough to a previous one"""
+
+    def __init__(self, threshold: float = 0.92, max_entries: int = 1000, path: Optional[str] = None):
+        """
+        Initialize the semantic cache
+
+        Args:
+            threshold: Minimum cosine similarity for a lookup to count as a hit
+            max_entries: Maximum number of entries kept; the oldest are dropped first
+            path: Optional .npz file the index is loaded from and saved to
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.path = path
+
+        # Parallel storage: row i of _vectors belongs to _scopes[i] and _values[i]
+        self._vectors = None  # float32 array of shape (n, dim), rows L2-normalized
+        self._scopes: List[str] = []
+        self._values: List[Any] = []
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            self._load()
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        """Convert an embedding to a unit-length float32 vector so a dot product is cosine similarity"""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, embedding: Sequence[float], scope: str = '') -> Optional[Any]:
+        """
+        Find the value stored for the most similar embedding
+
+        Args:
+            embedding: Query embedding
+            scope: Only entries stored with the same scope can match (e.g. request settings)
+
+        Returns:
+            The stored value if the best match reaches the threshold, otherwise None
+        """
+        query = self._normalize(embedding)
+
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != query.shape[0]:
+                return None
+
+            scores = self._vectors @ query
+            best_score, best_index = -1.0, None
+            for index in np.argsort(scores)[::-1]:
+                if self._scopes[index] == scope:
+                    best_score, best_index = float(scores[index]), index
+                    break
+
+            if best_index is None or best_score < self.threshold:
+                return None
+            return self._values[best_index]
+
+    def store(self, embedding: Sequence[float], value: Any, scope: str = '') -> None:
+        """
+        Add an entry to the cache
+
+        Args:
+            embedding: Embedding of the request
+            value: JSON-serializable value to return on later matches
+            scope: Scope the entry belongs to
+        """
+        vector = self._normalize(embedding)[np.newaxis, :]
+
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != vector.shape[1]:
+                self._vectors = vector
+                self._scopes, self._values = [scope], [value]
+            else:
+                self._vectors = np.vstack([self._vectors, vector])
+                self._scopes.append(scope)
+                self._values.append(value)
+
+            # Drop the oldest entries beyond the limit
+            overflow = len(self._values) - self.max_entries
+            if overflow > 0:
+                self._vectors = self._vectors[overflow:]
+                del self._scopes[:overflow]
+                del self._values[:overflow]
+
+            if self.path:
+                self._save()
+
+    def _load(self) -> None:
+        """Load a previously saved index"""
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                self._vectors = data['vectors'].astype(np.float32)
+                self._scopes = json.loads(str(data['scopes']))
+                self._values = json.loads(str(data['values']))
+        except Exception as e:
+            print(f"⚠️  Failed to load semantic cache from {self.path}: {e}")
+            self._vectors, self._scopes, self._values = None, [], []
+
+    def _save(self) -> None:
+        """Write the index to disk, replacing the previous file atomically"""
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(
+                    f,
+                    vectors=self._vectors,
+                    scopes=np.array(json.dumps(self._scopes)),
+                    values=np.array(json.dumps(self._values))
+                )
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"⚠️  Failed to save semantic cache to {self.path}: {e}")
@@ -1,10 +1,23 @@
 import boto3
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config as BotoConfig
 from botocore.exceptions import ClientError
 import os
-import uuid
+import secrets
+import string
 import base64
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+
+from services.llm_cache import InMemoryLRU
+
+# Share IDs stay alphanumeric: the share page extracts them with /\/s\/([a-zA-Z0-9]+)/
+_SHARE_ID_ALPHABET = string.ascii_letters + string.digits
+_SHARE_ID_LENGTH = 8
+
+# Lifetime of presigned view URLs, and how long a signed URL is reused (kept safely shorter)
+VIEW_URL_EXPIRES_IN = 3600
+VIEW_URL_CACHE_TTL = 3000
 
 class R2Storage:
     """Handles file uploads to Cloudflare R2 storage"""
@@ -40,10 +53,21 @@ class R2Storage:
             )
         )
 
+        # Large podcasts are streamed from disk in parts, uploaded in parallel
+        self.transfer_config = TransferConfig(
+            multipart_threshold=8 * 1024 * 1024,
+            multipart_chunksize=8 * 1024 * 1024,
+            max_concurrency=4,
+            use_threads=True
+        )
+
+        # Presigned view URLs by share ID, so hot podcasts are not re-signed on every request
+        self._url_cache = InMemoryLRU(maxsize=1024)
+
     def generate_share_id(self) -> str:
         """Generate a unique share ID (short and URL-friendly)"""
-        # Use first 8 characters of UUID for short, readable IDs
-        return str(uuid.uuid4())[:8]
+        # 8 random alphanumeric characters (~47 bits, more entropy than 8 hex digits)
+        return ''.join(secrets.choice(_SHARE_ID_ALPHABET) for _ in range(_SHARE_ID_LENGTH))
 
     @staticmethod
     def _encode_metadata(text: str) -> str:
@@ -98,20 +122,22 @@ class R2Storage:
             if metadata.get('duration'):
                 s3_metadata['duration'] = str(metadata['duration'])  # Numbers don't need encoding
 
-        # Add creation timestamp
-        s3_metadata['created-at'] = datetime.utcnow().isoformat()
-        s3_metadata['expires-at'] = (datetime.utcnow() + timedelta(days=3)).isoformat()
+        # Add creation timestamp (computed once so the stored and returned values match)
+        now = datetime.now(timezone.utc)
+        created_at = now.isoformat()
+        expires_at = (now + timedelta(days=3)).isoformat()
+        s3_metadata['created-at'] = created_at
+        s3_metadata['expires-at'] = expires_at
 
         try:
-            # Upload file to R2
-            with open(file_path, 'rb') as f:
-                self.client.put_object(
-                    Bucket=self.bucket_name,
-                    Key=r2_key,
-                    Body=f,
-                    ContentType='audio/wav',
-                    Metadata=s3_metadata
-                )
+            # Upload file to R2 (multipart above the threshold)
+            self.client.upload_file(
+                file_path,
+                self.bucket_name,
+                r2_key,
+                ExtraArgs={'ContentType': 'audio/wav', 'Metadata': s3_metadata},
+                Config=self.transfer_config
+            )
 
             # Generate URL for the file
             if self.public_url:
@@ -129,11 +155,11 @@ class R2Storage:
                 'share_id': share_id,
                 'r2_key': r2_key,
                 'url': url,
-                'uploaded_at': datetime.utcnow().isoformat(),
-                'expires_at': (datetime.utcnow() + timedelta(days=3)).isoformat()
+                'uploaded_at': created_at,
+                'expires_at': expires_at
             }
 
-        except ClientError as e:
+        except (ClientError, S3UploadFailedError) as e:
             raise Exception(f"Failed to upload to R2: {str(e)}")
 
     def get_file_metadata(self, share_id: str) -> dict:
@@ -160,11 +186,14 @@ class R2Storage:
             if self.public_url:
                 url = f"{self.public_url}/{r2_key}"
             else:
-                url = self.client.generate_presigned_url(
-                    'get_object',
-                    Params={'Bucket': self.bucket_name, 'Key': r2_key},
-                    ExpiresIn=3600  # 1 hour for viewing
-                )
+                url = self._url_cache.get(share_id)
+                if url is None:
+                    url = self.client.generate_presigned_url(
+                        'get_object',
+                        Params={'Bucket': self.bucket_name, 'Key': r2_key},
+                        ExpiresIn=VIEW_URL_EXPIRES_IN  # 1 hour for viewing
+                    )
+                    self._url_cache.set(share_id, url, VIEW_URL_CACHE_TTL)
 
             return {
                 'share_id': share_id,
@@ -200,6 +229,7 @@ class R2Storage:
                 Bucket=self.bucket_name,
                 Key=r2_key
             )
+            self._url_cache.delete(share_id)
             return True
         except ClientError as e:
             raise Exception(f"Failed to delete from R2: {str(e)}")
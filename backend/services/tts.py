@@ -1,18 +1,149 @@
 import requests
-from typing import Dict, List, Callable
+from requests.adapters import HTTPAdapter
+from typing import Dict, Iterable, List, Callable, Optional
+import hashlib
 import os
+import random
+import re
+import shutil
+import struct
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import partial
 from urllib.parse import urlencode
 
+from services.llm_cache import InMemoryLRU
+
+# Compress disk cache entries with zstd if available (falls back to plain WAV files)
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Runs of whitespace, collapsed when building TTS cache keys
+_WS_RE = re.compile(r'\s+')
+
+# Upper bound on a single retry wait, in seconds
+_MAX_RETRY_WAIT = 30
+
+# Hedged requests: a second request is sent for a clip that takes longer than twice the typical
+# latency for its voice. The delay starts at _INITIAL_HEDGE_DELAY until latencies have been seen.
+_INITIAL_HEDGE_DELAY = 5.0
+_MIN_HEDGE_DELAY = 1.0
+_MAX_HEDGE_DELAY = 30.0
+_LATENCY_EWMA_ALPHA = 0.2
+
+# zstd level for disk cache entries; low levels already get most of the gain on PCM audio
+_CACHE_COMPRESSION_LEVEL = 3
+
+# Errors that mean a disk cache entry is unreadable or corrupt; the cache is best-effort,
+# so these count as a miss rather than failing the segment
+_CACHE_CORRUPT_ERRORS = (zstandard.ZstdError,) if zstandard else ()
+
+# Bytes read from the start of a WAV file to find its fmt and data chunks
+_WAV_HEADER_READ_SIZE = 4096
+
+def _parse_wav_header(header: bytes, total_size: int):
+    """
+    Find the audio format and data size in a RIFF/WAVE header
+
+    Args:
+        header: The first bytes of the file
+        total_size: Size of the whole file, used when the data chunk size is a streaming placeholder
+
+    Returns:
+        Tuple of (sample_rate, channels, bits_per_sample, data_size), or None if the header is not
+        a WAV header that can be parsed
+    """
+    if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+        return None
+
+    fmt = None
+    offset = 12
+    while offset + 8 <= len(header):
+        chunk_id = header[offset:offset + 4]
+        chunk_size, = struct.unpack_from('<I', header, offset + 4)
+
+        if chunk_id == b'fmt ' and offset + 24 <= len(header):
+            channels, sample_rate, _, _, bits_per_sample = struct.unpack_from('<HIIHH', header, offset + 10)
+            fmt = (sample_rate, channels, bits_per_sample)
+        elif chunk_id == b'data':
+            if fmt is None:
+                return None
+            # Streamed WAVs may carry 0 or 0xFFFFFFFF here; never count past the end of the file
+            data_size = min(chunk_size or total_size, total_size - (offset + 8))
+            return fmt + (data_size,)
+
+        # Chunks are padded to an even size
+        offset += 8 + chunk_size + (chunk_size & 1)
+
+    return None
+
 class SpeechmaticsTTS:
     """Handles text-to-speech conversion using Speechmatics API"""
 
-    def __init__(self, api_key: str, base_url: str = "https://preview.tts.speechmatics.com/generate"):
+    def __init__(self, api_key: str, base_url: str = "https://preview.tts.speechmatics.com/generate",
+                 session: Optional[requests.Session] = None, max_concurrency: int = 8,
+                 cache_dir: Optional[str] = None, memory_cache_size: int = 32,
+                 cache_max_bytes: Optional[int] = None):
+        """
+        Initialize the TTS client
+
+        Args:
+            api_key: Speechmatics API key
+            base_url: Base URL of the TTS generate endpoint
+            session: Optional requests session; by default a pooled keep-alive session sized to max_concurrency
+            max_concurrency: Maximum number of segments synthesized at the same time, across all jobs
+            cache_dir: Optional directory where generated audio is cached by voice and text
+            memory_cache_size: Number of recently used clips also kept in memory (0 disables)
+            cache_max_bytes: Optional size limit for cache_dir, enforced by prune_cache
+        """
         self.api_key = api_key
+        self.cache_dir = cache_dir
+        self.cache_max_bytes = cache_max_bytes
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self._memory_cache = InMemoryLRU(maxsize=memory_cache_size) if memory_cache_size else None
+        self.max_concurrency = max_concurrency
+        # One pool for the client's lifetime, so threads are reused across jobs and total
+        # concurrency against Speechmatics stays bounded however many jobs run at once
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='tts')
+        # HTTP requests run on their own pool so segment workers can wait on them without
+        # deadlocking; the extra workers leave room for hedged requests on slow clips
+        hedge_slots = max(2, max_concurrency // 4)
+        self._request_executor = ThreadPoolExecutor(max_workers=max_concurrency + hedge_slots,
+                                                    thread_name_prefix='tts-request')
+        # Smoothed latency of successful requests per voice, used to time hedged requests
+        self._latency_ewma: Dict[str, float] = {}
+        self._latency_lock = threading.Lock()
+        # No hedged requests before this time (monotonic), set when Speechmatics asks us to back off
+        self._throttled_until = 0.0
+
+        if session is None:
+            # Every worker thread keeps a warm connection instead of a new TLS handshake per segment
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(max_concurrency + hedge_slots, 16), max_retries=0)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+
+        # Headers are the same for every request, so they live on the session
+        self.session = session
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        })
         self.base_url = base_url
+        # Endpoint URLs for the known voices, built once
+        self._voice_urls = {voice: self._get_endpoint_url(f"{base_url}/{voice}") for voice in ('sarah', 'theo')}
         self.sample_rate = 16000
 
+    def close(self) -> None:
+        """Release pooled connections and worker threads"""
+        self._executor.shutdown(wait=False)
+        self._request_executor.shutdown(wait=False)
+        self.session.close()
+
     def _get_endpoint_url(self, url: str) -> str:
         """Format the endpoint URL with the app tracking parameter.
 
@@ -26,6 +157,11 @@ class SpeechmaticsTTS:
         query = urlencode(query_params)
         return f"{url}?{query}"
 
+    def _get_voice_url(self, voice: str) -> str:
+        """Get the endpoint URL for a voice"""
+        voice = voice.lower()
+        return self._voice_urls.get(voice) or self._get_endpoint_url(f"{self.base_url}/{voice}")
+
     def generate_speech(self, text: str, voice: str, max_retries: int = 4) -> bytes:
         """
         Generate speech audio from text using specified voice
@@ -38,7 +174,160 @@ class SpeechmaticsTTS:
         Returns:
             WAV audio data as bytes
         """
-        voice_url = self._get_endpoint_url(f"{self.base_url}/{voice.lower()}")
+        cache_key = self._get_cache_key(text, voice)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
+        response = self._request_speech(text, voice, max_retries)
+        wav_data = response.content
+        self._validate_wav(wav_data[:_WAV_HEADER_READ_SIZE], len(wav_data), voice)
+
+        self._cache_set(cache_key, wav_data)
+        return wav_data
+
+    def generate_speech_to_file(self, text: str, voice: str, filepath: str, max_retries: int = 4) -> int:
+        """
+        Generate speech audio and stream it straight to a file, without holding the clip in memory
+
+        If the request is slow compared to recent requests for the voice, a second (hedged)
+        request is sent and whichever finishes first is used.
+
+        Args:
+            text: The text to convert to speech
+            voice: The voice to use ('sarah' or 'theo')
+            filepath: Path of the WAV file to write
+            max_retries: Maximum number of retry attempts (default: 4)
+
+        Returns:
+            Size of the written file in bytes
+        """
+        cache_key = self._get_cache_key(text, voice)
+        if self._cache_copy_to(cache_key, filepath):
+            return os.path.getsize(filepath)
+
+        # Each attempt writes to its own temporary name, so readers only ever see a complete
+        # segment file and a hedged request never writes over the one it raced
+        tmp_paths = {}
+        throttled = threading.Event()
+        primary = self._request_executor.submit(self._download_speech, text, voice, f"{filepath}.part",
+                                                max_retries, throttled)
+        tmp_paths[primary] = f"{filepath}.part"
+
+        # A primary slowed by rate-limit backoff is not a slow host: hedging it would only
+        # double the request rate while Speechmatics is asking us to back off
+        hedge_delay = self._get_hedge_delay(voice)
+        if not wait([primary], timeout=hedge_delay).done and self._can_hedge(throttled):
+            print(f"   No response for {voice} after {hedge_delay:.1f}s, sending a hedged request")
+            backup = self._request_executor.submit(self._download_speech, text, voice, f"{filepath}.hedge.part", max_retries)
+            tmp_paths[backup] = f"{filepath}.hedge.part"
+
+        # Take the first attempt that succeeds; fail only if every attempt fails
+        winner = None
+        error = None
+        pending = set(tmp_paths)
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    winner = future
+                    break
+                error = future.exception()
+
+        # Discard the loser: drop it if it has not started, otherwise delete its file when it finishes
+        for future in tmp_paths:
+            if future is not winner and not future.cancel():
+                future.add_done_callback(partial(self._discard_attempt, tmp_paths[future]))
+
+        if winner is None:
+            raise error
+
+        os.replace(tmp_paths[winner], filepath)
+        self._cache_store_file(cache_key, filepath)
+        return winner.result()
+
+    def _download_speech(self, text: str, voice: str, tmp_path: str, max_retries: int,
+                         throttled: Optional[threading.Event] = None) -> int:
+        """Stream one TTS response to tmp_path and record its latency; returns the file size"""
+        throttled = throttled or threading.Event()
+        start = time.monotonic()
+        response = self._request_speech(text, voice, max_retries, stream=True, throttled=throttled)
+        try:
+            with open(tmp_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    f.write(chunk)
+        except requests.RequestException as e:
+            self._discard_attempt(tmp_path)
+            raise Exception(f"Failed to generate speech for {voice}: {str(e)}")
+        finally:
+            response.close()
+
+        size = os.path.getsize(tmp_path)
+        with open(tmp_path, 'rb') as f:
+            header = f.read(_WAV_HEADER_READ_SIZE)
+        try:
+            self._validate_wav(header, size, voice)
+        except ValueError:
+            os.unlink(tmp_path)
+            raise
+
+        # Time spent in rate-limit backoff says nothing about the backend's latency
+        if not throttled.is_set():
+            self._record_latency(voice, time.monotonic() - start)
+        return size
+
+    def _validate_wav(self, header: bytes, total_size: int, voice: str) -> None:
+        """Raise ValueError unless the response is a WAV file at the expected sample rate"""
+        wav_format = _parse_wav_header(header, total_size)
+        if wav_format is None:
+            raise ValueError(f"Invalid audio data received for voice {voice}: not a WAV file")
+
+        sample_rate = wav_format[0]
+        if sample_rate != self.sample_rate:
+            raise ValueError(f"Unexpected sample rate {sample_rate} Hz for voice {voice} "
+                             f"(expected {self.sample_rate} Hz)")
+
+    @staticmethod
+    def _discard_attempt(tmp_path: str, future: Optional[Future] = None) -> None:
+        """Delete the temporary file of an abandoned or failed attempt"""
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+    def _record_latency(self, voice: str, seconds: float) -> None:
+        """Fold a successful request's latency into the voice's moving average"""
+        with self._latency_lock:
+            average = self._latency_ewma.get(voice)
+            if average is None:
+                self._latency_ewma[voice] = seconds
+            else:
+                self._latency_ewma[voice] = average + _LATENCY_EWMA_ALPHA * (seconds - average)
+
+    def _can_hedge(self, throttled: threading.Event) -> bool:
+        """Whether a hedged request may be sent for an attempt (not while rate limited)"""
+        if throttled.is_set():
+            return False
+        with self._latency_lock:
+            return time.monotonic() >= self._throttled_until
+
+    def _get_hedge_delay(self, voice: str) -> float:
+        """Seconds to wait for a request before sending a hedged duplicate"""
+        with self._latency_lock:
+            average = self._latency_ewma.get(voice)
+        if average is None:
+            return _INITIAL_HEDGE_DELAY
+        return min(max(2 * average, _MIN_HEDGE_DELAY), _MAX_HEDGE_DELAY)
+
+    def _request_speech(self, text: str, voice: str, max_retries: int = 4, stream: bool = False,
+                        throttled: Optional[threading.Event] = None) -> requests.Response:
+        """
+        Send a TTS request, retrying on rate limits; returns the successful response
+
+        A 429/503 sets throttled (if given) and holds off hedged requests client-wide
+        until the backoff has passed.
+        """
+        voice_url = self._get_voice_url(voice)
 
         data = {
             "text": text
@@ -48,12 +337,7 @@ class SpeechmaticsTTS:
 
         for attempt in range(max_retries):
             try:
-                headers = {
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                }
-
-                response = requests.post(voice_url, headers=headers, json=data, timeout=30)
+                response = self.session.post(voice_url, json=data, timeout=30, stream=stream)
 
                 # Log any non-200 status codes
                 if response.status_code != 200:
@@ -65,13 +349,7 @@ class SpeechmaticsTTS:
                         pass
 
                 response.raise_for_status()
-
-                wav_data = response.content
-
-                if not wav_data or len(wav_data) < 44:
-                    raise ValueError(f"Invalid audio data received for voice {voice}")
-
-                return wav_data
+                return response
 
             except requests.RequestException as e:
                 last_error = e
@@ -81,9 +359,13 @@ class SpeechmaticsTTS:
                     print(f"HTTP {status_code} error for voice '{voice}' (attempt {attempt + 1}/{max_retries})")
 
                     if status_code in [503, 429]:
+                        if throttled:
+                            throttled.set()
                         if attempt < max_retries - 1:
-                            wait_time = 2 ** (attempt + 1)
-                            print(f"   Retrying in {wait_time}s...")
+                            wait_time = self._get_retry_wait(attempt, e.response.headers)
+                            with self._latency_lock:
+                                self._throttled_until = max(self._throttled_until, time.monotonic() + wait_time)
+                            print(f"   Retrying in {wait_time:.1f}s...")
                             time.sleep(wait_time)
                             continue
                         else:
@@ -96,106 +378,355 @@ class SpeechmaticsTTS:
         # If we exhausted all retries
         raise Exception(f"Failed to generate speech for {voice} after {max_retries} attempts: {str(last_error)}")
 
-    def generate_dialogue_audio(self, dialogue: List[Dict[str, str]], output_dir: str,
-                                 progress_callback: Callable[[int, int], None] = None) -> List[Dict[str, any]]:
+    @staticmethod
+    def _get_retry_wait(attempt: int, headers) -> float:
+        """
+        Seconds to wait before retrying a rate-limited request
+
+        Honors a numeric Retry-After header; otherwise uses exponential backoff with full
+        jitter so parallel segment workers do not retry in lockstep.
+        """
+        retry_after = headers.get('Retry-After') if headers else None
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), _MAX_RETRY_WAIT)
+            except ValueError:
+                pass  # HTTP-date form; fall back to backoff
+
+        return random.uniform(0, min(_MAX_RETRY_WAIT, 2 ** (attempt + 1)))
+
+    def _get_cache_key(self, text: str, voice: str) -> str:
+        """Content address of a clip: hash of the endpoint, voice and whitespace-normalized text"""
+        normalized = _WS_RE.sub(' ', text).strip()
+        return hashlib.sha256(f"{self.base_url}|{voice.lower()}|{normalized}".encode('utf-8')).hexdigest()
+
+    def _cache_path(self, cache_key: str) -> str:
+        """Disk cache path for a clip; zstd-compressed entries get a .wav.zst suffix"""
+        suffix = '.wav.zst' if zstandard else '.wav'
+        return os.path.join(self.cache_dir, f"{cache_key}{suffix}")
+
+    def _cache_get(self, cache_key: str) -> Optional[bytes]:
+        """Look up a clip in memory, then on disk"""
+        if self._memory_cache:
+            wav_data = self._memory_cache.get(cache_key)
+            if wav_data is not None:
+                return wav_data
+
+        if not self.cache_dir:
+            return None
+
+        path = self._cache_path(cache_key)
+        try:
+            with open(path, 'rb') as f:
+                wav_data = f.read()
+            if zstandard:
+                wav_data = zstandard.ZstdDecompressor().decompressobj().decompress(wav_data)
+        except FileNotFoundError:
+            return None
+        except _CACHE_CORRUPT_ERRORS as e:
+            self._discard_cache_entry(path, e)
+            return None
+        except OSError as e:
+            print(f"⚠️  Failed to read TTS cache entry: {e}")
+            return None
+        self._touch_cache_entry(path)
+
+        if self._memory_cache:
+            self._memory_cache.set(cache_key, wav_data)
+        return wav_data
+
+    def _cache_set(self, cache_key: str, wav_data: bytes) -> None:
+        """Store a clip in memory and on disk; disk errors are logged and ignored"""
+        if self._memory_cache:
+            self._memory_cache.set(cache_key, wav_data)
+
+        if not self.cache_dir:
+            return
+
+        path = self._cache_path(cache_key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                if zstandard:
+                    f.write(zstandard.ZstdCompressor(level=_CACHE_COMPRESSION_LEVEL).compress(wav_data))
+                else:
+                    f.write(wav_data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️  Failed to write TTS cache entry: {e}")
+
+    def _cache_copy_to(self, cache_key: str, filepath: str) -> bool:
+        """Write a cached clip to filepath; returns False on a cache miss"""
+        if self._memory_cache:
+            wav_data = self._memory_cache.get(cache_key)
+            if wav_data is not None:
+                with open(filepath, 'wb') as f:
+                    f.write(wav_data)
+                return True
+
+        if not self.cache_dir:
+            return False
+
+        path = self._cache_path(cache_key)
+        try:
+            if zstandard:
+                with open(path, 'rb') as src, open(filepath, 'wb') as dst:
+                    zstandard.ZstdDecompressor().copy_stream(src, dst)
+            else:
+                shutil.copyfile(path, filepath)
+        except FileNotFoundError:
+            return False
+        except _CACHE_CORRUPT_ERRORS as e:
+            self._discard_cache_entry(path, e)
+            return False
+        except OSError as e:
+            print(f"⚠️  Failed to read TTS cache entry: {e}")
+            return False
+        self._touch_cache_entry(path)
+        return True
+
+    @staticmethod
+    def _discard_cache_entry(path: str, error: Exception) -> None:
+        """Delete a corrupt disk cache entry so it is regenerated next time"""
+        print(f"⚠️  Discarding corrupt TTS cache entry: {error}")
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _touch_cache_entry(path: str) -> None:
+        """Mark a disk cache entry as recently used, so prune_cache removes it last"""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def prune_cache(self) -> int:
+        """
+        Delete the least recently used disk cache entries until the cache fits cache_max_bytes
+
+        Returns:
+            Number of bytes freed
+        """
+        if not self.cache_dir or self.cache_max_bytes is None:
+            return 0
+
+        entries = []
+        total = 0
+        # Temporary files still being written are skipped; ones abandoned by a crash are not
+        stale_tmp_cutoff = time.time() - 3600
+        for entry in os.scandir(self.cache_dir):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if not entry.is_file() or (entry.name.endswith('.tmp') and stat.st_mtime > stale_tmp_cutoff):
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        freed = 0
+        for _, size, path in sorted(entries):
+            if total - freed <= self.cache_max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            freed += size
+
+        return freed
+
+    def _cache_store_file(self, cache_key: str, filepath: str) -> None:
+        """Copy a generated clip into the disk cache; errors are logged and ignored"""
+        if not self.cache_dir:
+            return
+
+        path = self._cache_path(cache_key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            if zstandard:
+                with open(filepath, 'rb') as src, open(tmp_path, 'wb') as dst:
+                    zstandard.ZstdCompressor(level=_CACHE_COMPRESSION_LEVEL).copy_stream(src, dst)
+            else:
+                shutil.copyfile(filepath, tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️  Failed to write TTS cache entry: {e}")
+
+    def generate_dialogue_audio(self, dialogue: Iterable[Dict[str, str]], output_dir: str,
+                                 progress_callback: Callable[[int, Optional[int]], None] = None,
+                                 on_segment: Callable[[Dict[str, any]], None] = None) -> List[Dict[str, any]]:
         """
         Generate audio for dialogue segments
 
         Args:
-            dialogue: List of dialogue segments with speaker and text
+            dialogue: Dialogue segments with speaker and text (a list, or an iterator
+                      that yields segments while the script is still being written)
             output_dir: Directory to save audio files
-            progress_callback: Optional callback function(completed, total) for progress updates
+            progress_callback: Optional callback function(completed, total) for progress updates;
+                               total is None when dialogue is an iterator
+            on_segment: Optional callback receiving each finished audio segment in dialogue order,
+                        as soon as every earlier segment is done (e.g. to append or upload it);
+                        an exception raised here fails the generation
 
         Returns:
             List of audio segments with metadata
         """
         os.makedirs(output_dir, exist_ok=True)
 
-        audio_segments = []
-        total_segments = len(dialogue)
-        batch_size = 2
-
-        print(f"Processing {total_segments} segments in batches of {batch_size}...")
-
-        # Process segments in batches
-        for batch_start in range(0, total_segments, batch_size):
-            batch_end = min(batch_start + batch_size, total_segments)
-            batch = dialogue[batch_start:batch_end]
-
-            # Process this batch in parallel
-            with ThreadPoolExecutor(max_workers=batch_size) as executor:
-                # Submit tasks for this batch
-                future_to_idx = {}
-                for i, segment in enumerate(batch):
-                    actual_idx = batch_start + i
-                    future = executor.submit(
-                        self._generate_segment,
-                        segment,
-                        actual_idx,
-                        output_dir
-                    )
-                    future_to_idx[future] = actual_idx
-
-                # Wait for all tasks in this batch to complete
-                batch_results = {}
-                for future in as_completed(future_to_idx):
-                    idx = future_to_idx[future]
-                    try:
-                        result = future.result()
-                        batch_results[idx] = result
-                    except Exception as e:
-                        raise Exception(f"Failed to generate audio for segment {idx}: {str(e)}")
-
-            # Add completed segments in order
-            for idx in sorted(batch_results.keys()):
-                audio_segments.append(batch_results[idx])
-
-            # Update progress
-            completed = len(audio_segments)
-            if progress_callback:
-                progress_callback(completed, total_segments)
-
-            print(f"Completed: {completed}/{total_segments} segments")
-
-        print(f"All {total_segments} segments generated successfully")
+        total_segments = len(dialogue) if hasattr(dialogue, '__len__') else None
+        results = {}
+        errors = []
+        completed = 0
+        # Futures wake wait() before running their done callbacks, so count handled callbacks
+        # and wait on those instead; nothing may touch results or callbacks after we return
+        handled = 0
+        lock = threading.Lock()
+        all_handled = threading.Condition(lock)
+
+        def on_segment_done(idx, future):
+            nonlocal completed, handled
+            with lock:
+                try:
+                    if future.cancelled():
+                        return
+
+                    error = future.exception()
+                    if error:
+                        errors.append((idx, error))
+                        return
+
+                    results[idx] = future.result()
+
+                    # The job is already failing; don't hand segments or progress to the caller
+                    if errors:
+                        return
+
+                    # Report the contiguous prefix so segments [0, completed) are always on disk
+                    previous = completed
+                    while completed in results:
+                        if on_segment:
+                            try:
+                                on_segment(results[completed])
+                            except Exception as e:
+                                errors.append((completed, e))
+                                break
+                        completed += 1
+
+                    if completed == previous:
+                        return
+
+                    if progress_callback:
+                        progress_callback(completed, total_segments)
+
+                    print(f"Completed: {completed}/{total_segments or '?'} segments")
+                finally:
+                    handled += 1
+                    all_handled.notify_all()
+
+        print(f"Processing {total_segments or 'streamed'} segments with up to {self.max_concurrency} in parallel...")
+
+        # Submit each segment as soon as it is available; completions are handled as they finish.
+        # Repeated lines (same speaker and text) reuse the first occurrence's audio.
+        futures = []
+        first_by_line = {}
+        aborted = False
+        try:
+            for idx, segment in enumerate(dialogue):
+                if errors:
+                    break
+
+                line = (segment['speaker'], segment['text'])
+                original = first_by_line.get(line)
+                if original is None:
+                    future = self._executor.submit(self._generate_segment, segment, idx, output_dir)
+                    first_by_line[line] = future
+                else:
+                    future = self._duplicate_segment(original, segment, idx, output_dir)
+
+                future.add_done_callback(partial(on_segment_done, idx))
+                futures.append(future)
+        except BaseException:
+            # The dialogue source failed (e.g. the script stream); don't spend TTS calls on a lost job
+            aborted = True
+            raise
+        finally:
+            if errors or aborted:
+                for future in futures:
+                    future.cancel()
+            with all_handled:
+                all_handled.wait_for(lambda: handled == len(futures))
+        submitted = len(futures)
+
+        if errors:
+            idx, error = min(errors, key=lambda item: item[0])
+            raise Exception(f"Failed to generate audio for segment {idx}: {str(error)}")
+
+        audio_segments = [results[idx] for idx in range(submitted)]
+
+        print(f"All {submitted} segments generated successfully")
         return audio_segments
 
+    def get_segment_path(self, output_dir: str, idx: int, speaker: str) -> str:
+        """Get the file path used for a dialogue segment's audio"""
+        return os.path.join(output_dir, f"segment_{idx:03d}_{speaker}.wav")
+
     def _generate_segment(self, segment: Dict[str, str], idx: int, output_dir: str) -> Dict[str, any]:
         """Generate audio for a single dialogue segment"""
         speaker = segment['speaker']
         text = segment['text']
 
-        # Generate audio
-        audio_data = self.generate_speech(text, speaker)
-
-        # Save to file
-        filename = f"segment_{idx:03d}_{speaker}.wav"
-        filepath = os.path.join(output_dir, filename)
-
-        with open(filepath, 'wb') as f:
-            f.write(audio_data)
+        # Generate audio straight into the segment file
+        filepath = self.get_segment_path(output_dir, idx, speaker)
+        file_size = self.generate_speech_to_file(text, speaker, filepath)
 
-        # Calculate duration
-        audio_bytes = len(audio_data) - 44  # Remove WAV header
-        samples = audio_bytes // 2  # 16-bit = 2 bytes per sample
-        duration = samples / self.sample_rate
+        # Calculate duration from the WAV header
+        with open(filepath, 'rb') as f:
+            header = f.read(_WAV_HEADER_READ_SIZE)
+        duration = self._get_duration(header, file_size)
 
         return {
             'index': idx,
             'speaker': speaker,
             'text': text,
             'filepath': filepath,
-            'duration': duration,
-            'audio_data': audio_data
+            'duration': duration
         }
 
+    def _duplicate_segment(self, original: Future, segment: Dict[str, str], idx: int, output_dir: str) -> Future:
+        """Future for a repeated line, resolved by linking the original segment's file once it is ready"""
+        duplicate = Future()
+
+        def link_file(done: Future):
+            if not duplicate.set_running_or_notify_cancel():
+                return
+
+            try:
+                source = done.result()
+                filepath = self.get_segment_path(output_dir, idx, segment['speaker'])
+                try:
+                    os.link(source['filepath'], filepath)
+                except OSError:
+                    shutil.copyfile(source['filepath'], filepath)
+                duplicate.set_result({**source, 'index': idx, 'filepath': filepath})
+            except BaseException as e:
+                duplicate.set_exception(e)
+
+        original.add_done_callback(link_file)
+        return duplicate
+
     def calculate_audio_duration(self, wav_data: bytes) -> float:
         """Calculate the duration of WAV audio data in seconds"""
-        if len(wav_data) < 44:
-            return 0.0
+        return self._get_duration(wav_data[:_WAV_HEADER_READ_SIZE], len(wav_data))
 
-        audio_bytes = len(wav_data) - 44  # Remove WAV header
-        samples = audio_bytes // 2  # 16-bit = 2 bytes per sample
-        duration = samples / self.sample_rate
+    def _get_duration(self, header: bytes, total_size: int) -> float:
+        """Duration in seconds from a WAV header; 0.0 if the header cannot be parsed"""
+        wav_format = _parse_wav_header(header, total_size)
+        if not wav_format:
+            return 0.0
 
-        return duration
+        sample_rate, channels, bits_per_sample, data_size = wav_format
+        bytes_per_second = sample_rate * channels * (bits_per_sample // 8)
+        return data_size / bytes_per_second if bytes_per_second else 0.0
@@ -14,8 +14,17 @@ class Config:
     # Flask Configuration
     FLASK_ENV = os.getenv('FLASK_ENV', 'development')
     FLASK_PORT = int(os.getenv('FLASK_PORT', 8080))
+    STATIC_MAX_AGE = int(os.getenv('STATIC_MAX_AGE', 86400))  # Cache lifetime for frontend assets (seconds)
+
+    # Job Queue Configuration
+    MAX_CONCURRENT_JOBS = int(os.getenv('MAX_CONCURRENT_JOBS', os.cpu_count() or 4))
+    MAX_QUEUED_JOBS = int(os.getenv('MAX_QUEUED_JOBS', 20))
+    MAX_JOBS = int(os.getenv('MAX_JOBS', 100))  # Finished jobs kept in memory
+    JOB_TTL_SECONDS = int(os.getenv('JOB_TTL_SECONDS', 86400))
+    JOB_CLEANUP_INTERVAL = int(os.getenv('JOB_CLEANUP_INTERVAL', 600))
 
     # Speechmatics TTS Configuration
+    TTS_CONCURRENCY = int(os.getenv('TTS_CONCURRENCY', 8))  # Segments synthesized at once, shared by all jobs
     SPEECHMATICS_BASE_URL = "https://preview.tts.speechmatics.com/generate"
     SARAH_VOICE_URL = f"{SPEECHMATICS_BASE_URL}/sarah"
     THEO_VOICE_URL = f"{SPEECHMATICS_BASE_URL}/theo"
@@ -23,9 +32,21 @@ class Config:
     # Audio Configuration
     SAMPLE_RATE = 16000
     OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), '..', 'output')
+    TTS_CACHE_DIR = os.getenv('TTS_CACHE_DIR', os.path.join(OUTPUT_DIR, '.tts_cache'))
+    TTS_CACHE_MAX_MB = int(os.getenv('TTS_CACHE_MAX_MB', 500))  # Least recently used clips are pruned beyond this
 
     # OpenAI Configuration
     OPENAI_MODEL = "gpt-4o"
+    OPENAI_USE_SDK = os.getenv('OPENAI_USE_SDK', 'false').lower() == 'true'  # Stream through the openai SDK instead of direct HTTP
+
+    # Script Cache Configuration
+    LLM_CACHE_SIZE = int(os.getenv('LLM_CACHE_SIZE', 256))
+    LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', 86400))
+    REDIS_URL = os.getenv('REDIS_URL')  # Optional - share the script cache across processes
+    SEMANTIC_CACHE_ENABLED = os.getenv('SEMANTIC_CACHE_ENABLED', 'false').lower() == 'true'
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', 0.92))
+    SEMANTIC_CACHE_SIZE = int(os.getenv('SEMANTIC_CACHE_SIZE', 1000))
+    SEMANTIC_CACHE_PATH = os.getenv('SEMANTIC_CACHE_PATH')  # Optional - persist the index to this .npz file
 
     # Cloudflare R2 Configuration
     R2_ACCOUNT_ID = os.getenv('R2_ACCOUNT_ID')
@@ -0,0 +1,58 @@
+import queue
+import threading
+from typing import Iterable, Iterator, TypeVar
+
+T = TypeVar('T')
+
+_DONE = object()
+
+def iterate_in_background(iterable: Iterable[T], maxsize: int = 16) -> Iterator[T]:
+    """
+    Drain an iterable on a background thread, handing items over through a bounded queue
+
+    Lets a slow producer (e.g. a streaming LLM response) keep running while the
+    consumer is busy with earlier items. Exceptions raised by the producer are
+    re-raised in the consumer.
+
+    Args:
+        iterable: Source of items, consumed on the background thread
+        maxsize: Maximum number of items buffered between producer and consumer
+
+    Yields:
+        Items from the iterable, in order
+    """
+    items = queue.Queue(maxsize=maxsize)
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        # Give up if the consumer has gone away instead of blocking forever
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    break
+        except Exception as e:
+            put(e)
+        finally:
+            put(_DONE)
+
+    threading.Thread(target=produce, daemon=True).start()
+
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stopped.set()